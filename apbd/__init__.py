@@ -0,0 +1,5 @@
+"""Data layer for the APBD dashboard (loading, aggregation, query helpers).
+
+Everything in this package is Streamlit-free so it can be reused by
+benchmarks and non-UI consumers; ``app.py`` wraps it with the caches.
+"""
@@ -0,0 +1,129 @@
+"""Account-code hierarchy (``4.`` → ``41.`` → ``411.``) aggregated per pemda.
+
+Labels of ``level1`` / ``level2`` / ``level3`` start with a numeric account
+code whose prefixes give the tree: ``411. Pajak Daerah`` sits under
+``41. Pendapatan Asli Daerah (PAD)`` which sits under ``4. Pendapatan``. Codes
+are parsed once per distinct label, every long row is mapped to its deepest
+node, and a single ``np.bincount`` over ``(pemda, node)`` gives the leaf sums.
+Totals for every level follow from one product with the prefix (ancestor)
+matrix, so breakdowns at any depth are array lookups afterwards.
+"""
+from __future__ import annotations
+
+import re
+
+import numpy as np
+import pandas as pd
+
+from apbd import aggregate
+
+LEVELS = ["level1", "level2", "level3"]
+ROOT = ""
+
+_CODE = re.compile(r"^\s*(\d+)\s*\.?\s*(.*)$")
+
+
+def parse_label(label: str) -> tuple[str | None, str]:
+    """``"411. Pajak Daerah"`` → ``("411", "Pajak Daerah")``; no code → ``(None, label)``."""
+    text = str(label).strip()
+    m = _CODE.match(text)
+    if not m:
+        return None, text
+    return m.group(1), m.group(2).strip() or m.group(1)
+
+
+def _parent(code: str, known: set[str]) -> str:
+    for i in range(len(code) - 1, 0, -1):
+        if code[:i] in known:
+            return code[:i]
+    return ROOT
+
+
+class AccountTree:
+    """Per-pemda totals for every account node, aligned with the rows of ``wide``.
+
+    ``nodes`` lists ``code``, ``name``, ``parent`` and ``depth`` (1 = level1)
+    in code order; ``totals`` is a (pemda × node) float64 matrix.
+    """
+
+    def __init__(self, df_long: pd.DataFrame, wide: pd.DataFrame, levels: list[str] = LEVELS):
+        levels = [lv for lv in levels if lv in df_long.columns]
+
+        # codes and names from the distinct labels of each level
+        names: dict[str, str] = {}
+        level_labels = []
+        for lv in levels:
+            codes, uniques = pd.factorize(df_long[lv])
+            parsed = [parse_label(u) for u in uniques]
+            for code, name in parsed:
+                if code is not None:
+                    names.setdefault(code, name)
+            level_labels.append((codes, [code for code, _ in parsed]))
+
+        order = sorted(names)
+        known = set(order)
+        node_id = {code: i for i, code in enumerate(order)}
+        self.nodes = pd.DataFrame({
+            "code": order,
+            "name": [names[c] for c in order],
+            "parent": [_parent(c, known) for c in order],
+        })
+        self.nodes["depth"] = [1 + sum(c[:i] in known for i in range(1, len(c))) for c in order]
+        self._id = node_id
+
+        # deepest coded level of each row
+        leaf = np.full(len(df_long), -1, dtype=np.int64)
+        for codes, label_codes in level_labels:
+            lookup = np.array([node_id.get(c, -1) if c is not None else -1 for c in label_codes] + [-1], dtype=np.int64)
+            node = lookup[codes]  # code -1 (NaN label) hits the trailing -1
+            leaf = np.where(node >= 0, node, leaf)
+
+        # long rows → wide rows
+        gid, key_table = aggregate.group_codes(df_long)
+        wide_keys = pd.MultiIndex.from_frame(wide[aggregate.KEYS].astype(str))
+        group_pos = wide_keys.get_indexer(pd.MultiIndex.from_frame(key_table.astype(str)))
+        pemda = np.where(gid >= 0, group_pos[gid], -1)
+
+        n_pemda, n_nodes = len(wide), len(order)
+        valid = (pemda >= 0) & (leaf >= 0)
+        leaf_sums = np.bincount(
+            pemda[valid] * n_nodes + leaf[valid],
+            weights=np.asarray(df_long["nilai"], dtype=np.float64)[valid],
+            minlength=n_pemda * n_nodes,
+        ).reshape(n_pemda, n_nodes)
+
+        # ancestor[i, j]: node j is node i or one of its ancestors
+        ancestor = np.array([[ci.startswith(cj) for cj in order] for ci in order], dtype=np.float64)
+        self.totals = leaf_sums @ ancestor
+        self.totals.flags.writeable = False
+        self.wide = wide
+
+    def label(self, code: str) -> str:
+        """``"411. Pajak Daerah"`` form of a node."""
+        return f"{code}. {self.nodes.at[self._id[code], 'name']}"
+
+    def children(self, code: str = ROOT) -> list[str]:
+        """Codes of the direct children of ``code`` (level1 nodes for the root)."""
+        return self.nodes.loc[self.nodes["parent"] == code, "code"].tolist()
+
+    def parents(self) -> list[str]:
+        """Codes of every node that has children."""
+        return sorted(set(self.nodes["parent"]) - {ROOT})
+
+    def values(self, codes: list[str], rows: np.ndarray | None = None) -> np.ndarray:
+        """(pemda × codes) totals, restricted to ``rows`` of ``wide`` if given."""
+        cols = [self._id[c] for c in codes]
+        out = self.totals[:, cols]
+        return out if rows is None else out[rows]
+
+    def breakdown(self, code: str = ROOT, rows: np.ndarray | None = None) -> pd.DataFrame:
+        """Children of ``code`` summed over ``rows``: ``kode``, ``akun``, ``nilai``, ``porsi``."""
+        kids = self.children(code)
+        sums = self.values(kids, rows).sum(axis=0)
+        total = sums.sum()
+        return pd.DataFrame({
+            "kode": kids,
+            "akun": [self.label(c) for c in kids],
+            "nilai": sums,
+            "porsi": sums / total if total else np.nan,
+        })
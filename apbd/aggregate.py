@@ -0,0 +1,193 @@
+"""Single-pass aggregation of the long table into one row per pemda.
+
+Instead of filtering ``df_long`` once per output column with ``str.contains``
+and merging the pieces on the string keys, every distinct ``level1`` /
+``level2`` label is classified once, rows are mapped to integer codes and all
+money columns come out of a single ``np.bincount`` over ``(pemda, label)``.
+
+``build_cube`` rolls the wide table up to provinsi and pulau so hierarchy-only
+filter states are answered in O(groups).
+"""
+from __future__ import annotations
+
+from collections.abc import Iterable
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from apbd import filters
+
+KEYS = ["daerah", "provinsi", "pulau"]
+
+# (output column, level1 keyword, level2 keyword or None) — same case-insensitive
+# substring rules the dashboard has always used.
+COMPONENTS: list[tuple[str, str, str | None]] = [
+    ("total_pendapatan", "Pendapatan", None),
+    ("total_belanja", "Belanja", None),
+    ("pad", "Pendapatan", "PAD"),
+    ("belanja_operasi", "Belanja", "Belanja Operasi"),
+    ("belanja_modal", "Belanja", "Belanja Modal"),
+    ("belanja_tidak_terduga", "Belanja", "Belanja Tidak Terduga"),
+    ("belanja_transfer", "Belanja", "Belanja Transfer"),
+]
+MONEY_COLS = [c for c, _, _ in COMPONENTS]
+BELANJA_COMPONENTS = ["belanja_operasi", "belanja_modal", "belanja_tidak_terduga", "belanja_transfer"]
+CUBE_COLS = MONEY_COLS + ["surplus_defisit"]
+
+
+def _label_codes(values: pd.Series) -> tuple[np.ndarray, pd.Index]:
+    """Factorize a label column; missing labels get an extra trailing code."""
+    codes, uniques = pd.factorize(values)
+    uniques = pd.Index(uniques).astype(str)
+    codes = np.where(codes < 0, len(uniques), codes)
+    return codes, uniques
+
+
+def _matches(uniques: pd.Index, keyword: str | None) -> np.ndarray:
+    """Boolean per unique label (+ the missing slot, never matched)."""
+    if keyword is None:
+        hit = np.ones(len(uniques), dtype=bool)
+    else:
+        hit = np.asarray(uniques.str.contains(keyword, case=False, regex=False), dtype=bool)
+    return np.append(hit, False)
+
+
+def classify_labels(level1: pd.Series, level2: pd.Series) -> tuple[np.ndarray, np.ndarray]:
+    """Classify rows by their ``(level1, level2)`` label pair.
+
+    Returns ``(pair_codes, membership)`` where ``pair_codes`` is one int per
+    row and ``membership[pair, j]`` says whether that pair feeds
+    ``COMPONENTS[j]``. Only the distinct labels are string-matched.
+    """
+    c1, u1 = _label_codes(level1)
+    c2, u2 = _label_codes(level2)
+    n2 = len(u2) + 1
+    pair_codes = c1 * n2 + c2
+
+    membership = np.empty(((len(u1) + 1) * n2, len(COMPONENTS)), dtype=bool)
+    for j, (_, kw1, kw2) in enumerate(COMPONENTS):
+        membership[:, j] = np.outer(_matches(u1, kw1), _matches(u2, kw2)).ravel()
+    return pair_codes, membership
+
+
+def group_codes(df: pd.DataFrame, keys: list[str] = KEYS) -> tuple[np.ndarray, pd.DataFrame]:
+    """Integer group id per row (``-1`` for rows with a missing key) plus the
+    sorted key table, matching ``groupby(keys, sort=True)`` order.
+
+    Key columns of the table are categoricals holding only the observed
+    values."""
+    codes = []
+    uniques = []
+    for k in keys:
+        c, u = pd.factorize(df[k], sort=True)
+        codes.append(c.astype(np.int64))
+        uniques.append(u)
+
+    valid = np.ones(len(df), dtype=bool)
+    combined = np.zeros(len(df), dtype=np.int64)
+    for c, u in zip(codes, uniques):
+        valid &= c >= 0
+        combined = combined * len(u) + c
+
+    gid = np.full(len(df), -1, dtype=np.int64)
+    inner, groups = pd.factorize(combined[valid], sort=True)
+    gid[valid] = inner
+
+    parts = {}
+    rem = np.asarray(groups, dtype=np.int64)
+    for k, u in reversed(list(zip(keys, uniques))):
+        rem, idx = np.divmod(rem, len(u))
+        parts[k] = pd.Categorical.from_codes(idx, categories=np.asarray(u))
+    key_table = pd.DataFrame({k: parts[k] for k in keys})
+    return gid, key_table
+
+
+def add_derived(wide: pd.DataFrame) -> pd.DataFrame:
+    """Surplus/defisit and ratio columns derived from the money columns."""
+    wide["surplus_defisit"] = wide["total_pendapatan"] - wide["total_belanja"]
+
+    # ratios
+    wide["rasio_pad"] = np.where(wide["total_pendapatan"] > 0, wide["pad"] / wide["total_pendapatan"], np.nan)
+    wide["rasio_modal"] = np.where(wide["total_belanja"] > 0, wide["belanja_modal"] / wide["total_belanja"], np.nan)
+    wide["rasio_operasi"] = np.where(wide["total_belanja"] > 0, wide["belanja_operasi"] / wide["total_belanja"], np.nan)
+    return wide
+
+
+def build_wide(df_long: pd.DataFrame) -> pd.DataFrame:
+    """One row per ``(daerah, provinsi, pulau)`` with pendapatan, belanja, PAD,
+    the four belanja components, surplus/defisit and ratios.
+
+    A pemda is included when it has at least one Pendapatan or Belanja row.
+    """
+    gid, key_table = group_codes(df_long)
+    pair_codes, membership = classify_labels(df_long["level1"], df_long["level2"])
+    n_groups = len(key_table)
+    n_pairs = membership.shape[0]
+
+    valid = gid >= 0
+    cell = gid[valid] * n_pairs + pair_codes[valid]
+    nilai = np.asarray(df_long["nilai"], dtype=np.float64)[valid]
+    sums = np.bincount(cell, weights=nilai, minlength=n_groups * n_pairs).reshape(n_groups, n_pairs)
+    counts = np.bincount(cell, minlength=n_groups * n_pairs).reshape(n_groups, n_pairs)
+
+    totals = sums @ membership.astype(np.float64)
+    present = (counts @ membership[:, :2].astype(np.int64)).sum(axis=1) > 0
+
+    wide = key_table.loc[present].reset_index(drop=True)
+    for j, col in enumerate(MONEY_COLS):
+        wide[col] = totals[present, j]
+    return add_derived(wide)
+
+
+def update_wide(wide: pd.DataFrame, df_long: pd.DataFrame, daerah: set[str] | list[str]) -> pd.DataFrame:
+    """Re-aggregate only the given daerah from ``df_long`` and splice them into
+    ``wide``; other rows are reused as-is. Same result as ``build_wide(df_long)``
+    as long as only those daerah changed."""
+    daerah = list(daerah)
+    fresh = build_wide(df_long[filters.code_mask(df_long["daerah"], daerah)])
+    kept = wide[~filters.code_mask(wide["daerah"], daerah)]
+    merged = pd.concat([kept.astype({k: str for k in KEYS}), fresh.astype({k: str for k in KEYS})], ignore_index=True)
+
+    gid, key_table = group_codes(merged)
+    out = merged.iloc[np.argsort(gid, kind="stable")].reset_index(drop=True)
+    for k in KEYS:
+        out[k] = key_table[k]
+    return out
+
+
+@dataclass(frozen=True)
+class Cube:
+    """Pemda counts (``n``) and sums of ``CUBE_COLS`` per ``(pulau, provinsi)``
+    and per ``pulau``, in ``groupby(sort=True)`` order."""
+    provinsi: pd.DataFrame
+    pulau: pd.DataFrame
+
+    def totals(self, pulau: str = filters.ALL, provinsi: Iterable[str] = ()) -> dict[str, float]:
+        """``n`` and column sums for a sidebar pulau / provinsi selection."""
+        provinsi = list(provinsi)
+        if provinsi:
+            level = self.provinsi
+            mask = filters.hierarchy_mask(level, pulau, provinsi)
+        else:
+            level = self.pulau
+            mask = filters.hierarchy_mask(level, pulau)
+        sums = level[["n"] + CUBE_COLS].to_numpy(dtype=np.float64)[mask].sum(axis=0)
+        out = dict(zip(CUBE_COLS, sums[1:].tolist()))
+        out["n"] = int(sums[0])
+        return out
+
+
+def _rollup(wide: pd.DataFrame, keys: list[str]) -> pd.DataFrame:
+    gid, table = group_codes(wide, keys)
+    valid = gid >= 0
+    n = len(table)
+    table["n"] = np.bincount(gid[valid], minlength=n)
+    for col in CUBE_COLS:
+        table[col] = np.bincount(gid[valid], weights=wide[col].to_numpy(dtype=np.float64)[valid], minlength=n)
+    return table
+
+
+def build_cube(wide: pd.DataFrame) -> Cube:
+    """Roll ``wide`` up to provinsi and pulau level (one bincount per column)."""
+    return Cube(provinsi=_rollup(wide, ["pulau", "provinsi"]), pulau=_rollup(wide, ["pulau"]))
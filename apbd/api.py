@@ -0,0 +1,273 @@
+"""Headless JSON API over the dashboard's data layer (stdlib only).
+
+Serves the KPI cards and the top-N ranking without a Streamlit rerun or a
+Plotly render, reusing the same refresher snapshots, ``FilterCache`` and
+``Ranker`` as the app. Requests are handled by a fixed thread pool and all of
+them share one warm in-memory cache.
+
+    python -m apbd.api --port 8600 --workers 8
+
+Endpoints (all ``GET``; filters: ``tahun``, ``jenis``, ``pulau``,
+``provinsi`` (repeatable), ``q``):
+
+* ``/kpi`` — jumlah daerah, total pendapatan/belanja, surplus/defisit
+* ``/ranking`` — top ``n`` (default 20) by ``metric`` (default
+  ``total_pendapatan``)
+* ``/partitions`` — available ``(tahun, jenis)``
+* ``/health`` — refresher status and snapshot versions
+* ``/metrics`` — per-endpoint latency histograms and cache counters
+  (Prometheus text format)
+* ``/export`` — the filtered rows as a file download, streamed in chunks
+  (``table`` = ``wide`` | ``long``, ``format`` = ``csv`` | ``parquet`` |
+  ``xlsx``; ``display=1`` writes Rupiah / percent strings instead of raw
+  numbers)
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+from apbd import export, filters, incremental, metrics, ranking, search, shared, watcher
+
+MAX_N = 500
+RANKING_COLS = ["daerah", "provinsi", "pulau", "total_pendapatan", "total_belanja", "surplus_defisit",
+                "pad", "rasio_pad", "rasio_modal", "rasio_operasi"]
+
+
+class ApiError(ValueError):
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+class Service:
+    """Query layer shared by every request thread."""
+
+    def __init__(self, refresher: watcher.Refresher | shared.SharedRefresher):
+        self.refresher = refresher
+        self._lock = threading.Lock()
+        # per partition: (snapshot, FilterCache, Ranker) of its latest version
+        self._derived: dict[tuple[int, str], tuple[incremental.Snapshot, filters.FilterCache, ranking.Ranker]] = {}
+
+    def _select(self, params: dict[str, list[str]]):
+        parts = self.refresher.partitions()
+        if not parts:
+            raise ApiError("tidak ada partisi data", 503)
+        tahun = _first(params, "tahun")
+        jenis = _first(params, "jenis")
+        for part in parts:
+            if (tahun is None or str(part.tahun) == tahun) and (jenis is None or part.jenis.lower() == jenis.lower()):
+                break
+        else:
+            raise ApiError(f"partisi tidak ditemukan: tahun={tahun}, jenis={jenis}", 404)
+
+        snap = self.refresher.snapshot(part)
+        with self._lock:
+            cached = self._derived.get(part.key)
+            if cached is None or cached[0] is not snap:
+                cached = (snap, filters.FilterCache(snap.wide), ranking.Ranker(snap.wide))
+                self._derived[part.key] = cached
+                metrics.register_cache(f"filter {part.tahun} {part.jenis}", cached[1].stats)
+        _, fcache, rk = cached
+        rows = fcache.rows(_first(params, "pulau") or filters.ALL, params.get("provinsi", []), _first(params, "q") or "")
+        return part, snap, rows, rk
+
+    def kpi(self, params: dict[str, list[str]]) -> dict:
+        part, snap, rows, _ = self._select(params)
+        out = {"tahun": part.tahun, "jenis": part.jenis, "version": snap.version, "jumlah_daerah": int(len(rows))}
+        if search.normalize(_first(params, "q") or ""):
+            for c in ("total_pendapatan", "total_belanja", "surplus_defisit"):
+                out[c] = float(snap.wide[c].to_numpy()[rows].sum())
+        else:
+            # hierarchy-only filter: straight from the roll-up cube
+            totals = snap.cube.totals(_first(params, "pulau") or filters.ALL, params.get("provinsi", []))
+            for c in ("total_pendapatan", "total_belanja", "surplus_defisit"):
+                out[c] = totals[c]
+        return out
+
+    def ranking(self, params: dict[str, list[str]]) -> dict:
+        metric = _first(params, "metric") or "total_pendapatan"
+        if metric not in ranking.RANK_METRICS:
+            raise ApiError(f"metric harus salah satu dari {ranking.RANK_METRICS}")
+        try:
+            n = int(_first(params, "n") or 20)
+        except ValueError:
+            raise ApiError("n harus bilangan bulat") from None
+        n = max(1, min(n, MAX_N))
+        part, snap, rows, rk = self._select(params)
+        pos = rk.top(metric, n, rows)
+        cols = {c: filters.take(snap.wide[c], pos) for c in RANKING_COLS}
+        return {
+            "tahun": part.tahun,
+            "jenis": part.jenis,
+            "version": snap.version,
+            "metric": metric,
+            "rows": [{c: _json_value(cols[c][i]) for c in RANKING_COLS} for i in range(len(pos))],
+        }
+
+    def export(self, params: dict[str, list[str]]):
+        """``(filename, content type, byte chunks)`` of the filtered rows."""
+        table = _first(params, "table") or "wide"
+        if table not in export.TABLES:
+            raise ApiError(f"table harus salah satu dari {list(export.TABLES)}")
+        fmt = _first(params, "format") or "csv"
+        if fmt not in export.available_formats():
+            raise ApiError(f"format harus salah satu dari {export.available_formats()}")
+        part, snap, rows, _ = self._select(params)
+        if table == "wide":
+            frame, pos = snap.wide, rows
+        else:
+            frame, pos = snap.long, export.long_positions(snap.long, snap.wide, rows)
+        if fmt == "xlsx" and len(pos) > export.XLSX_MAX_ROWS:
+            raise ApiError(f"XLSX maksimal {export.XLSX_MAX_ROWS:,} baris; gunakan CSV atau Parquet")
+        return (export.filename(table, fmt, part.tahun, part.jenis), export.FORMATS[fmt],
+                export.iter_export(fmt, frame, pos, display=_first(params, "display") in ("1", "true")))
+
+    def partitions(self, params: dict[str, list[str]]) -> dict:
+        return {"partitions": [{"tahun": p.tahun, "jenis": p.jenis, "files": list(p.paths)}
+                               for p in self.refresher.partitions()]}
+
+    def health(self, params: dict[str, list[str]]) -> dict:
+        return self.refresher.status()
+
+
+def _first(params: dict[str, list[str]], name: str) -> str | None:
+    values = params.get(name)
+    return values[0] if values else None
+
+
+def _json_value(v):
+    if isinstance(v, (float, np.floating)):
+        return None if np.isnan(v) else float(v)
+    return str(v)
+
+
+class Handler(BaseHTTPRequestHandler):
+    service: Service  # set by make_server
+    routes = {"/kpi": "kpi", "/ranking": "ranking", "/partitions": "partitions", "/health": "health"}
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        if url.path.rstrip("/") == "/metrics":
+            self._send_text(metrics.REGISTRY.render())
+            return
+        if url.path.rstrip("/") == "/export":
+            self._send_export(parse_qs(url.query))
+            return
+        route = self.routes.get(url.path.rstrip("/") or "/")
+        try:
+            if route is None:
+                raise ApiError(f"endpoint tidak dikenal: {url.path}", 404)
+            with metrics.stage(f"api {route}"):
+                payload = getattr(self.service, route)(parse_qs(url.query))
+            self._send(200, payload)
+        except ApiError as exc:
+            self._send(exc.status, {"error": str(exc)})
+        except Exception as exc:
+            self._send(500, {"error": f"{type(exc).__name__}: {exc}"})
+
+    def _send(self, status: int, payload: dict) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_text(self, text: str) -> None:
+        body = text.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_export(self, params: dict[str, list[str]]) -> None:
+        try:
+            name, content_type, chunks = self.service.export(params)
+        except ApiError as exc:
+            self._send(exc.status, {"error": str(exc)})
+            return
+        except Exception as exc:
+            self._send(500, {"error": f"{type(exc).__name__}: {exc}"})
+            return
+        # no Content-Length: the body is generated while it is sent and the
+        # end of the HTTP/1.0 response is marked by closing the connection
+        with metrics.stage("api export"):
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Disposition", f'attachment; filename="{name}"')
+            self.end_headers()
+            for chunk in chunks:
+                self.wfile.write(chunk)
+
+    def log_message(self, format: str, *args) -> None:  # keep load tests quiet
+        pass
+
+
+class PooledHTTPServer(HTTPServer):
+    """HTTPServer dispatching connections to a fixed-size thread pool."""
+
+    daemon_threads = True
+
+    def __init__(self, address, handler, workers: int):
+        super().__init__(address, handler)
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="apbd-api")
+
+    def process_request(self, request, client_address) -> None:
+        self.pool.submit(self._handle, request, client_address)
+
+    def _handle(self, request, client_address) -> None:
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self) -> None:
+        super().server_close()
+        self.pool.shutdown(wait=False)
+
+
+def make_server(data_dir: str, host: str = "127.0.0.1", port: int = 8600, workers: int = 8,
+                interval: float = 10.0, shared_dir: str = "") -> PooledHTTPServer:
+    if shared_dir:
+        ref = shared.SharedRefresher(shared_dir, interval)
+    else:
+        ref = watcher.Refresher(data_dir, interval).start()
+    service = Service(ref)
+    handler = type("BoundHandler", (Handler,), {"service": service})
+    return PooledHTTPServer((host, port), handler, workers)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="JSON API for APBD KPIs and rankings.")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8600)
+    ap.add_argument("--workers", type=int, default=8)
+    ap.add_argument("--data-dir", default=os.environ.get("APBD_DATA_DIR", "data"))
+    ap.add_argument("--shared-dir", default=os.environ.get("APBD_SHARED_DIR", ""),
+                    help="memory-map tables published by `python -m apbd.shared` instead of parsing CSVs")
+    ap.add_argument("--refresh-seconds", type=float, default=float(os.environ.get("APBD_REFRESH_SECONDS", "10")))
+    args = ap.parse_args()
+
+    server = make_server(args.data_dir, args.host, args.port, args.workers, args.refresh_seconds, args.shared_dir)
+    print(f"APBD API on http://{args.host}:{server.server_address[1]} ({args.workers} workers)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
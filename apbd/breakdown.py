@@ -0,0 +1,41 @@
+"""Batch extraction of spending components for the breakdown pies.
+
+The wide table is indexed by ``daerah`` once per dataset and the component
+columns are copied into one (rows × components) array, so any pick list is
+resolved with a single ``get_indexer`` and one fancy-index gather instead
+of a boolean scan and a small DataFrame per daerah.
+"""
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from apbd.aggregate import BELANJA_COMPONENTS
+
+
+class Breakdown:
+    """Per-dataset ``daerah`` index over the component columns of ``wide``."""
+
+    def __init__(self, wide: pd.DataFrame, components: list[str] = BELANJA_COMPONENTS):
+        self.wide = wide
+        self.components = list(components)
+        names = wide["daerah"].astype(str).to_numpy()
+        # first occurrence wins, as with the old ``iloc[0]`` lookup
+        first = ~pd.Index(names).duplicated()
+        self._index = pd.Index(names[first])
+        self._pos = np.flatnonzero(first)
+        self.values = wide[self.components].to_numpy(dtype=np.float64)
+
+    def positions(self, names: list[str]) -> np.ndarray:
+        """Row positions of ``names`` in ``wide`` (unknown names are dropped)."""
+        ix = self._index.get_indexer(pd.Index(names, dtype=object))
+        return self._pos[ix[ix >= 0]]
+
+    def column(self, col: str, pos: np.ndarray) -> np.ndarray:
+        """Values of ``col`` at ``pos`` as float64."""
+        return self.wide[col].to_numpy(dtype=np.float64)[pos]
+
+
+def pages(items: list, size: int) -> int:
+    """Number of pages of ``size`` items (at least 1)."""
+    return max(1, -(-len(items) // max(1, size)))
@@ -0,0 +1,158 @@
+"""Persistent columnar cache for the normalized long table.
+
+The first load of a CSV writes the normalized table (dimension columns as
+categoricals) to an uncompressed Arrow IPC file under ``data/.cache/``; later
+loads memory-map that file and skip CSV parsing entirely. A sidecar JSON
+records the source's size, mtime and content hash: size+mtime is the fast
+check, the hash is only recomputed when those changed (e.g. after a
+``touch`` or a re-copy), so an identical file never triggers a rebuild.
+
+Pre-build the cache (e.g. at image build time)::
+
+    python -m apbd.cache data/APBD_2023.csv
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import time
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from apbd import loader
+
+# bump when loader.normalize_long / loader.to_compact change
+CACHE_VERSION = 2
+CACHE_DIR = os.environ.get("APBD_CACHE_DIR", "")
+
+
+def cache_paths(path: str) -> tuple[str, str]:
+    """``(arrow_file, meta_file)`` for a source CSV.
+
+    In a shared ``APBD_CACHE_DIR`` the name carries a short hash of the
+    absolute source path, so ``data/2023/APBD.csv`` and ``data/2024/APBD.csv``
+    get separate files."""
+    name = os.path.basename(path)
+    if CACHE_DIR:
+        base = CACHE_DIR
+        tag = hashlib.blake2b(os.path.abspath(path).encode("utf-8"), digest_size=6).hexdigest()
+        name = f"{name}.{tag}"
+    else:
+        base = os.path.join(os.path.dirname(os.path.abspath(path)), ".cache")
+    return os.path.join(base, name + ".arrow"), os.path.join(base, name + ".meta.json")
+
+
+def file_hash(path: str, chunk_size: int = 1 << 20) -> str:
+    h = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as fh:
+        while chunk := fh.read(chunk_size):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def source_stamp(path: str) -> dict:
+    st_ = os.stat(path)
+    return {"size": st_.st_size, "mtime_ns": st_.st_mtime_ns}
+
+
+def _read_meta(meta_path: str) -> dict | None:
+    try:
+        with open(meta_path, encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json_atomic(path: str, payload: dict) -> None:
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(payload, fh, indent=2)
+    os.replace(tmp, path)
+
+
+def is_fresh(path: str) -> bool:
+    """True when the cache for ``path`` exists and matches the source file.
+
+    Refreshes the stored size/mtime when only those changed but the content
+    hash is the same."""
+    arrow_path, meta_path = cache_paths(path)
+    meta = _read_meta(meta_path)
+    if not meta or meta.get("version") != CACHE_VERSION or not os.path.exists(arrow_path):
+        return False
+    stamp = source_stamp(path)
+    if meta.get("size") == stamp["size"] and meta.get("mtime_ns") == stamp["mtime_ns"]:
+        return True
+    if meta.get("size") != stamp["size"] or meta.get("hash") != file_hash(path):
+        return False
+    try:
+        _write_json_atomic(meta_path, {**meta, **stamp})
+    except OSError:
+        pass
+    return True
+
+
+def read_cache(path: str) -> pd.DataFrame:
+    """Memory-map the cached Arrow file for ``path``."""
+    arrow_path, _ = cache_paths(path)
+    table = pa.ipc.open_file(pa.memory_map(arrow_path, "r")).read_all()
+    return table.to_pandas()
+
+
+def write_cache(path: str, df: pd.DataFrame) -> None:
+    """Write ``df`` as the cache of ``path`` (atomic replace of both files)."""
+    arrow_path, meta_path = cache_paths(path)
+    os.makedirs(os.path.dirname(arrow_path), exist_ok=True)
+    stamp = source_stamp(path)
+    digest = file_hash(path)
+
+    tmp = f"{arrow_path}.{os.getpid()}.tmp"
+    feather.write_feather(df, tmp, compression="uncompressed")
+    os.replace(tmp, arrow_path)
+    _write_json_atomic(meta_path, {"version": CACHE_VERSION, **stamp, "hash": digest})
+
+
+def build_cache(path: str) -> pd.DataFrame:
+    """Parse + normalize the CSV chunk by chunk, write the cache and return
+    the table."""
+    df = loader.load_long_chunked(path)
+    write_cache(path, df)
+    return df
+
+
+def load_long(path: str) -> pd.DataFrame:
+    """``loader.load_long`` backed by the on-disk cache.
+
+    A cache that cannot be read or written (read-only volume, corrupt file)
+    never breaks loading; it just falls back to parsing the CSV."""
+    try:
+        if is_fresh(path):
+            return read_cache(path)
+    except (OSError, pa.ArrowException):
+        pass
+    try:
+        return build_cache(path)
+    except OSError:
+        return loader.load_long_chunked(path)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Pre-build the Arrow cache for APBD CSV files.")
+    ap.add_argument("paths", nargs="+", help="source CSV file(s)")
+    ap.add_argument("--force", action="store_true", help="rebuild even when the cache is fresh")
+    args = ap.parse_args()
+
+    for path in args.paths:
+        t0 = time.perf_counter()
+        if not args.force and is_fresh(path):
+            print(f"{path}: cache fresh ({cache_paths(path)[0]})")
+            continue
+        df = build_cache(path)
+        print(f"{path}: {len(df):,} rows -> {cache_paths(path)[0]} in {time.perf_counter() - t0:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+"""Chunked export of the filtered wide table or its long line items.
+
+Every format is produced by a generator of byte chunks and only
+``chunksize`` rows are converted at a time: CSV text per chunk, one Parquet
+row group per chunk (drained from the writer's sink as it goes) and, for
+XLSX, openpyxl's write-only mode spooled to a temporary file that is then
+read back in blocks. Values stay raw (numbers as numbers) unless ``display`` is set: then each
+chunk's money columns become Rupiah strings (T/M/Jt) and its ratios
+percents, via the vectorized ``formatting.idr`` / ``formatting.pct``.
+The headless API streams these generators straight to the socket. The
+dashboard writes them to an unbuffered temporary file and hands that file
+to ``st.download_button``, so it never collects the chunks in memory
+itself (Streamlit still loads the finished file once to serve it).
+"""
+from __future__ import annotations
+
+import io
+import tempfile
+from collections.abc import Iterator
+
+import numpy as np
+import pandas as pd
+
+from apbd import aggregate, filters, formatting
+
+CHUNKSIZE = 50_000
+XLSX_MAX_ROWS = 1_048_575  # Excel sheet limit minus the header row
+BLOCK = 1 << 20
+
+FORMATS = {
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+TABLES = ("wide", "long")
+MONEY_COLS = set(aggregate.CUBE_COLS) | {"nilai"}
+
+
+def available_formats() -> list[str]:
+    """Formats whose writer is installed (XLSX needs openpyxl)."""
+    out = ["csv", "parquet"]
+    try:
+        import openpyxl  # noqa: F401
+    except ImportError:
+        return out
+    return out + ["xlsx"]
+
+
+def long_positions(df_long: pd.DataFrame, wide: pd.DataFrame, rows: np.ndarray) -> np.ndarray:
+    """Positions in ``df_long`` of the line items of the pemda at ``rows`` of ``wide``.
+
+    Matched on the categorical ``daerah`` codes: only a boolean mask over
+    the long table is allocated, no key strings."""
+    if len(rows) == len(wide):
+        return np.arange(len(df_long))
+    return np.flatnonzero(filters.code_mask(df_long["daerah"], filters.take(wide["daerah"], rows)))
+
+
+def display_frame(part: pd.DataFrame) -> pd.DataFrame:
+    """``part`` with money columns as ``fmt_idr`` strings and ``rasio_*``
+    columns as ``fmt_pct`` strings, each column formatted in one go."""
+    out = {}
+    for c in part.columns:
+        if c in MONEY_COLS:
+            out[c] = formatting.idr(part[c].to_numpy())
+        elif str(c).startswith("rasio_"):
+            out[c] = formatting.pct(part[c].to_numpy())
+    return part.assign(**out)
+
+
+def _chunks(frame: pd.DataFrame, positions: np.ndarray, chunksize: int,
+            display: bool = False) -> Iterator[pd.DataFrame]:
+    for start in range(0, len(positions), chunksize):
+        part = frame.iloc[positions[start:start + chunksize]]
+        yield display_frame(part) if display else part
+
+
+class _Drain(io.RawIOBase):
+    """Write-only sink whose buffered bytes can be taken out between writes."""
+
+    def __init__(self):
+        self._parts: list[bytes] = []
+        self._pos = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        data = bytes(b)
+        self._parts.append(data)
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def iter_csv(frame: pd.DataFrame, positions: np.ndarray, chunksize: int = CHUNKSIZE,
+             display: bool = False) -> Iterator[bytes]:
+    yield frame.iloc[:0].to_csv(index=False).encode("utf-8")
+    for part in _chunks(frame, positions, chunksize, display):
+        yield part.to_csv(index=False, header=False).encode("utf-8")
+
+
+def iter_parquet(frame: pd.DataFrame, positions: np.ndarray, chunksize: int = CHUNKSIZE,
+                 display: bool = False) -> Iterator[bytes]:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    sink = _Drain()
+    empty = frame.iloc[:0]
+    schema = pa.Schema.from_pandas(display_frame(empty) if display else empty, preserve_index=False)
+    with pq.ParquetWriter(sink, schema) as writer:
+        for part in _chunks(frame, positions, chunksize, display):
+            writer.write_table(pa.Table.from_pandas(part, schema=schema, preserve_index=False))
+            yield sink.drain()
+    yield sink.drain()
+
+
+def iter_xlsx(frame: pd.DataFrame, positions: np.ndarray, chunksize: int = CHUNKSIZE,
+              display: bool = False) -> Iterator[bytes]:
+    from openpyxl import Workbook
+
+    if len(positions) > XLSX_MAX_ROWS:
+        raise ValueError(f"XLSX maksimal {XLSX_MAX_ROWS:,} baris; gunakan CSV atau Parquet")
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("data")
+    ws.append([str(c) for c in frame.columns])
+    for part in _chunks(frame, positions, chunksize, display):
+        values = part.astype(object).where(part.notna(), None)
+        for row in values.itertuples(index=False, name=None):
+            ws.append(row)
+    with tempfile.TemporaryFile() as tmp:
+        wb.save(tmp)
+        tmp.seek(0)
+        while block := tmp.read(BLOCK):
+            yield block
+
+
+WRITERS = {"csv": iter_csv, "parquet": iter_parquet, "xlsx": iter_xlsx}
+
+
+def iter_export(fmt: str, frame: pd.DataFrame, positions: np.ndarray | None = None,
+                chunksize: int = CHUNKSIZE, display: bool = False) -> Iterator[bytes]:
+    """Byte chunks of ``frame`` (rows at ``positions``, default all) as ``fmt``;
+    ``display`` writes formatted Rupiah / percent strings instead of raw values."""
+    if fmt not in WRITERS:
+        raise ValueError(f"format harus salah satu dari {list(WRITERS)}")
+    if positions is None:
+        positions = np.arange(len(frame))
+    return WRITERS[fmt](frame, positions, chunksize, display)
+
+
+def filename(table: str, fmt: str, tahun: int, jenis: str) -> str:
+    return f"apbd_{tahun}_{jenis.lower()}_{table}.{fmt}"
@@ -0,0 +1,123 @@
+"""Row filters over the wide table (categorical codes + search index) and a
+shared cache of their results."""
+from __future__ import annotations
+
+import threading
+from collections import OrderedDict
+from collections.abc import Iterable
+
+import numpy as np
+import pandas as pd
+
+from apbd import search
+
+ALL = "(Semua)"
+
+
+def code_mask(col: pd.Series, values: Iterable[str]) -> np.ndarray:
+    """``col.isin(values)`` for a categorical column, compared on integer codes.
+
+    Falls back to a plain ``isin`` for non-categorical columns."""
+    values = list(values)
+    if not isinstance(col.dtype, pd.CategoricalDtype):
+        return col.isin(values).to_numpy()
+    wanted = col.cat.categories.get_indexer(values)
+    wanted = wanted[wanted >= 0]
+    codes = col.cat.codes.to_numpy()
+    if len(wanted) == 1:
+        return codes == wanted[0]
+    return np.isin(codes, wanted)
+
+
+def hierarchy_mask(wide: pd.DataFrame, pulau: str = ALL, provinsi: Iterable[str] = ()) -> np.ndarray:
+    """Boolean row mask for the sidebar pulau / provinsi selection."""
+    mask = np.ones(len(wide), dtype=bool)
+    if pulau and pulau != ALL:
+        mask &= code_mask(wide["pulau"], [pulau])
+    provinsi = list(provinsi)
+    if provinsi:
+        mask &= code_mask(wide["provinsi"], provinsi)
+    return mask
+
+
+def take(col: pd.Series, pos: np.ndarray) -> np.ndarray:
+    """Values of ``col`` at ``pos`` without materializing the whole column."""
+    if isinstance(col.dtype, pd.CategoricalDtype):
+        return np.asarray(col.cat.categories)[col.cat.codes.to_numpy()[pos]]
+    return col.to_numpy()[pos]
+
+
+def filter_key(pulau: str = ALL, provinsi: Iterable[str] = (), q: str = "") -> tuple:
+    """Normalized, hashable form of the sidebar filter state."""
+    return (pulau or ALL, tuple(sorted(set(provinsi))), search.normalize(q))
+
+
+class FilterCache:
+    """Bounded LRU of filter results (row positions into ``wide``).
+
+    Meant to be held once per dataset and shared by every session; results
+    are read-only ``int`` arrays, so callers can't corrupt each other's
+    entries. The search index is built lazily on the first text query.
+    """
+
+    def __init__(self, wide: pd.DataFrame, maxsize: int = 256):
+        self.wide = wide
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._index: search.SearchIndex | None = None
+        self._entries: OrderedDict[tuple, np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def index(self) -> search.SearchIndex:
+        if self._index is None:
+            self._index = search.SearchIndex(self.wide)
+        return self._index
+
+    def _compute(self, key: tuple) -> np.ndarray:
+        pulau, provinsi, q = key
+        mask = hierarchy_mask(self.wide, pulau, provinsi)
+        if q:
+            mask &= self.index.mask(q)
+        rows = np.flatnonzero(mask)
+        rows.flags.writeable = False
+        return rows
+
+    def rows(self, pulau: str = ALL, provinsi: Iterable[str] = (), q: str = "") -> np.ndarray:
+        """Sorted row positions of ``wide`` matching the filter state."""
+        key = filter_key(pulau, provinsi, q)
+        with self._lock:
+            rows = self._entries.get(key)
+            if rows is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return rows
+            self.misses += 1
+            rows = self._compute(key)
+            self._entries[key] = rows
+            if len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+            return rows
+
+    def options(self, rows: np.ndarray, col: str = "daerah") -> list[str]:
+        """Sorted distinct values of ``col`` at ``rows`` (widget options),
+        from the categorical codes instead of a filtered copy."""
+        values = self.wide[col]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            used = np.unique(values.cat.codes.to_numpy()[rows])
+            names = values.cat.categories[used[used >= 0]]
+        else:
+            names = pd.unique(values.to_numpy()[rows])
+        return sorted(str(v) for v in names)
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entries": len(self._entries),
+                "maxsize": self.maxsize,
+            }
@@ -0,0 +1,139 @@
+"""Rupiah and percent formatting, per value and for whole arrays.
+
+``fmt_idr`` / ``fmt_pct`` format one value (insight text, captions).
+``idr`` / ``pct`` produce the same strings for whole arrays. The unit
+(T / M / Jt) is picked with ``np.select``, values are rounded to integer
+steps (hundredths or units) and turned into digits with integer ``astype(str)``
+plus one thousands-grouping pass per digit group (not per cell), so
+formatting every pemda costs a handful of array operations. Values within
+a few ulps of a rounding tie are re-rounded exactly, so the output matches
+the per-value functions. ``money_unit`` picks one unit for a whole column,
+for tables that keep numbers numeric and format them with
+``st.column_config`` (the unit goes in the column header).
+"""
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+# (threshold, divisor, suffix), largest first
+UNITS = [(1e12, 1e12, "T"), (1e9, 1e9, "M"), (1e6, 1e6, "Jt")]
+
+
+def fmt_idr(x: float) -> str:
+    if pd.isna(x):
+        return "Rp 0"
+    x = float(x)
+    absx = abs(x)
+    if absx >= 1e12:
+        return f"Rp {x/1e12:,.2f} T"
+    if absx >= 1e9:
+        return f"Rp {x/1e9:,.2f} M"
+    if absx >= 1e6:
+        return f"Rp {x/1e6:,.2f} Jt"
+    return f"Rp {x:,.0f}"
+
+
+def fmt_pct(x: float) -> str:
+    if pd.isna(x) or np.isinf(x):
+        return "-"
+    return f"{x*100:.1f}%"
+
+
+# digit strings of 0..999, plain and zero-padded, gathered instead of formatted
+_PLAIN = np.array([str(i) for i in range(1000)])
+_PAD3 = np.array([f"{i:03d}" for i in range(1000)])
+_PAD2 = np.array([f"{i:02d}" for i in range(100)])
+
+
+def _group_thousands(ints: np.ndarray) -> np.ndarray:
+    """Non-negative integers as strings with ``,`` every three digits."""
+    # a group is zero-padded only when a higher group precedes it
+    rest = ints // 1000
+    out = np.where(rest > 0, _PAD3[ints % 1000], _PLAIN[ints % 1000]).astype("<U27")
+    idx = np.flatnonzero(rest > 0)
+    rest = rest[idx]
+    while len(idx):
+        higher = rest // 1000
+        head = np.where(higher > 0, _PAD3[rest % 1000], _PLAIN[rest % 1000])
+        out[idx] = np.char.add(np.char.add(head, ","), out[idx])
+        keep = higher > 0
+        idx, rest = idx[keep], higher[keep]
+    return out
+
+
+def _round_steps(v: np.ndarray, decimals: np.ndarray) -> np.ndarray:
+    """``v`` rounded to ``decimals`` places, as int64 steps of 10**-decimals.
+
+    Half-to-even on ``v * 10**decimals``; near-ties (where that product is
+    off by its own rounding error) fall back to printf on ``v`` itself."""
+    scale = 10.0 ** decimals
+    t = v * scale
+    steps = np.rint(t)
+    near = np.flatnonzero(np.abs(t - np.floor(t) - 0.5) <= 4 * np.spacing(t))
+    for i in near:
+        steps[i] = round(float(f"{v[i]:.{int(decimals[i])}f}") * scale[i])
+    return steps.astype(np.int64)
+
+
+def _exact_tail(out: np.ndarray, x: np.ndarray, steps: np.ndarray, fmt) -> np.ndarray:
+    """Redo values whose step count is beyond exact float integers with ``fmt``."""
+    huge = np.flatnonzero(np.isfinite(x) & (steps >= 2.0**52))
+    if len(huge):
+        out = out.astype(object)
+        out[huge] = [fmt(v) for v in x[huge]]
+        out = out.astype(str)
+    return out
+
+
+def idr(values) -> np.ndarray:
+    """``fmt_idr`` for every element of ``values`` (array of str)."""
+    x = np.asarray(values, dtype=np.float64)
+    a = np.abs(x)
+    conds = [a >= t for t, _, _ in UNITS]
+    scaled = a / np.select(conds, [d for _, d, _ in UNITS], default=1.0)
+    suffix = np.select(conds, [f" {s}" for _, _, s in UNITS], default="")
+    decimals = np.select(conds, [True] * len(UNITS), default=False)
+
+    # integer hundredths (2 decimals) or units (0 decimals)
+    exact = np.isfinite(x) & (np.where(decimals, scaled * 100, scaled) < 2.0**52)
+    steps = _round_steps(np.where(exact, scaled, 0.0), np.where(decimals, 2, 0))
+    whole = np.where(decimals, steps // 100, steps)
+    number = _group_thousands(whole)
+    frac = _PAD2[steps % 100]
+    number = np.where(decimals, np.char.add(np.char.add(number, "."), frac), number)
+    sign = np.where(np.signbit(x), "-", "")
+    out = np.char.add(np.char.add(np.char.add("Rp ", sign), number), suffix)
+
+    out = np.where(np.isnan(x), "Rp 0", out)
+    out = np.where(np.isinf(x), np.where(x > 0, "Rp inf T", "Rp -inf T"), out)
+    return _exact_tail(out, x, np.where(decimals, scaled * 100, scaled), fmt_idr)
+
+
+def pct(values) -> np.ndarray:
+    """``fmt_pct`` for every element of ``values`` (array of str)."""
+    x = np.asarray(values, dtype=np.float64)
+    finite = np.isfinite(x)
+    exact = finite & (np.abs(x) * 1000 < 2.0**52)
+    tenths = _round_steps(np.where(exact, x * 100, 0.0), np.ones(len(x), dtype=np.int64))
+    whole = np.abs(tenths) // 10
+    digits = _PLAIN[np.minimum(whole, 999)].astype("<U21")
+    big = np.flatnonzero(whole > 999)
+    digits[big] = whole[big].astype(str)
+    sign = np.where(np.signbit(x) & finite, "-", "")
+    out = np.char.add(np.char.add(np.char.add(sign, digits), "."), _PLAIN[np.abs(tenths) % 10])
+    out = np.where(finite, np.char.add(out, "%"), "-")
+    return _exact_tail(out, x, np.abs(x) * 1000, fmt_pct)
+
+
+def money_unit(values, q: float = 10) -> tuple[float, str]:
+    """``(divisor, suffix)`` for a whole column, from the ``q``-th percentile
+    of its non-zero magnitudes: a low quantile, so the smaller pemda (most
+    rows) keep their digits instead of rounding to ``0.05 T``."""
+    a = np.abs(np.asarray(values, dtype=np.float64))
+    a = a[np.isfinite(a) & (a > 0)]
+    m = float(np.percentile(a, q)) if len(a) else 0.0
+    for threshold, divisor, suffix in UNITS:
+        if m >= threshold:
+            return divisor, suffix
+    return 1.0, ""
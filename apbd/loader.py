@@ -0,0 +1,82 @@
+"""Reading and normalizing the long-format APBD export."""
+from __future__ import annotations
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+REQUIRED_COLS = {"daerah", "provinsi", "pulau", "level1", "level2", "nilai"}
+CHUNKSIZE = 200_000
+
+
+def normalize_long(df: pd.DataFrame) -> pd.DataFrame:
+    """Normalize column names and values of a raw export."""
+    # normalize colnames
+    df.columns = [str(c).strip().lower().replace(" ", "_") for c in df.columns]
+
+    # minimal compatibility for similar datasets
+    ren = {}
+    if "namapemda" in df.columns: ren["namapemda"] = "daerah"
+    if "nama_pemda" in df.columns: ren["nama_pemda"] = "daerah"
+    if "pemda" in df.columns: ren["pemda"] = "daerah"
+    df = df.rename(columns=ren)
+
+    missing = sorted(list(REQUIRED_COLS - set(df.columns)))
+    if missing:
+        raise KeyError(
+            "Kolom wajib tidak ditemukan: "
+            + ", ".join(missing)
+            + f". Kolom yang ada: {list(df.columns)}"
+        )
+
+    df["daerah"] = df["daerah"].astype(str).str.strip()
+    df["provinsi"] = df["provinsi"].astype(str).str.strip()
+    df["pulau"] = df["pulau"].astype(str).str.strip()
+    df["level1"] = df["level1"].astype(str).str.strip()
+    df["level2"] = df["level2"].astype(str).str.strip()
+    df["nilai"] = pd.to_numeric(df["nilai"], errors="coerce").fillna(0.0)
+
+    return df
+
+
+def to_compact(df: pd.DataFrame) -> pd.DataFrame:
+    """Dimension (string) columns as categoricals, ``nilai`` as float64 and
+    ``tahun`` as int16. Cuts memory per row several times and lets filters
+    compare integer codes instead of strings."""
+    for c in df.columns:
+        if c == "nilai":
+            df[c] = df[c].astype("float64")
+        elif c == "tahun" and pd.api.types.is_integer_dtype(df[c]):
+            df[c] = df[c].astype("int16")
+        elif not pd.api.types.is_numeric_dtype(df[c]) and not isinstance(df[c].dtype, pd.CategoricalDtype):
+            df[c] = df[c].astype("category")
+    return df
+
+
+def concat_long(frames: list[pd.DataFrame]) -> pd.DataFrame:
+    """Concatenate compact long tables, merging category sets (kept sorted)
+    instead of falling back to object columns."""
+    frames = [f for f in frames if len(f)] or frames[:1]
+    if len(frames) == 1:
+        return frames[0].reset_index(drop=True)
+    out = {}
+    for c in frames[0].columns:
+        cols = [f[c] for f in frames]
+        if all(isinstance(s.dtype, pd.CategoricalDtype) for s in cols):
+            out[c] = union_categoricals([s.array for s in cols], sort_categories=True)
+        else:
+            out[c] = pd.concat(cols, ignore_index=True)
+    return to_compact(pd.DataFrame(out))
+
+
+def load_long(path: str, compact: bool = True) -> pd.DataFrame:
+    df = normalize_long(pd.read_csv(path))
+    return to_compact(df) if compact else df
+
+
+def load_long_chunked(path: str, chunksize: int = CHUNKSIZE) -> pd.DataFrame:
+    """``load_long(path)`` without parsing the whole file at once.
+
+    Each chunk of ``chunksize`` rows is normalized and made compact before
+    the next one is read, so only one chunk exists as raw strings; the
+    categorical chunks are then merged with ``concat_long``."""
+    return concat_long([to_compact(normalize_long(chunk)) for chunk in pd.read_csv(path, chunksize=chunksize)])
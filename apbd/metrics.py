@@ -0,0 +1,179 @@
+"""Always-on, process-wide stage metrics with a Prometheus text exporter.
+
+``stage(name)`` times a block into a fixed-bucket latency histogram and can
+count the rows it processed; cache statistics are pulled from registered
+``stats()`` callables at export time. Quantiles (p50/p95/p99) are estimated
+from the buckets the same way Prometheus' ``histogram_quantile`` does, so
+the in-app numbers and the scraped ones agree.
+
+    with metrics.stage("filter") as s:
+        rows = ...
+        s.rows = len(rows)
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections.abc import Callable
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from apbd import profiling
+
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram (seconds) plus a row counter."""
+
+    def __init__(self, buckets: tuple[float, ...] = BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last = +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.rows = 0
+
+    def observe(self, seconds: float, rows: int | None = None) -> None:
+        i = 0
+        while i < len(self.buckets) and seconds > self.buckets[i]:
+            i += 1
+        self.counts[i] += 1
+        self.count += 1
+        self.sum += seconds
+        if rows is not None:
+            self.rows += rows
+
+    def quantile(self, q: float) -> float:
+        """Estimated ``q``-quantile in seconds (linear within a bucket)."""
+        if not self.count:
+            return float("nan")
+        target = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if seen + n >= target and n:
+                lo = self.buckets[i - 1] if i > 0 else 0.0
+                hi = self.buckets[i] if i < len(self.buckets) else self.buckets[-1]
+                return lo + (hi - lo) * (target - seen) / n
+            seen += n
+        return self.buckets[-1]
+
+
+class _Stage:
+    __slots__ = ("rows",)
+
+    def __init__(self):
+        self.rows: int | None = None
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hist: dict[str, Histogram] = {}
+        self._collectors: dict[str, Callable[[], dict]] = {}
+
+    def observe(self, name: str, seconds: float, rows: int | None = None) -> None:
+        with self._lock:
+            hist = self._hist.get(name)
+            if hist is None:
+                hist = self._hist[name] = Histogram()
+            hist.observe(seconds, rows)
+        profiling.record(name, seconds)
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time the block as ``name``; set ``.rows`` on the yielded object to
+        count processed rows."""
+        s = _Stage()
+        start = time.perf_counter()
+        try:
+            yield s
+        finally:
+            self.observe(name, time.perf_counter() - start, s.rows)
+
+    def register_cache(self, name: str, stats: Callable[[], dict]) -> None:
+        """Export ``stats()`` (``hits``, ``misses``, ``entries``, ...) as cache ``name``."""
+        with self._lock:
+            self._collectors[name] = stats
+
+    def summary(self) -> list[dict]:
+        """One dict per stage: count, mean/p50/p95/p99 (ms) and rows."""
+        with self._lock:
+            items = sorted(self._hist.items())
+            return [{
+                "stage": name,
+                "count": h.count,
+                "mean_ms": h.sum / h.count * 1000 if h.count else float("nan"),
+                "p50_ms": h.quantile(0.50) * 1000,
+                "p95_ms": h.quantile(0.95) * 1000,
+                "p99_ms": h.quantile(0.99) * 1000,
+                "rows": h.rows,
+            } for name, h in items]
+
+    def caches(self) -> dict[str, dict]:
+        with self._lock:
+            collectors = dict(self._collectors)
+        return {name: fn() for name, fn in sorted(collectors.items())}
+
+    def render(self) -> str:
+        """Prometheus text exposition of every stage and cache."""
+        out = [
+            "# HELP apbd_stage_seconds Latency of instrumented stages.",
+            "# TYPE apbd_stage_seconds histogram",
+        ]
+        rows = []
+        with self._lock:
+            for name, h in sorted(self._hist.items()):
+                label = _label(name)
+                cumulative = 0
+                for le, n in zip([*h.buckets, "+Inf"], h.counts):
+                    cumulative += n
+                    out.append(f'apbd_stage_seconds_bucket{{stage="{label}",le="{le}"}} {cumulative}')
+                out.append(f'apbd_stage_seconds_sum{{stage="{label}"}} {h.sum:.6f}')
+                out.append(f'apbd_stage_seconds_count{{stage="{label}"}} {h.count}')
+                rows.append(f'apbd_stage_rows_total{{stage="{label}"}} {h.rows}')
+        out += ["# HELP apbd_stage_rows_total Rows processed by instrumented stages.",
+                "# TYPE apbd_stage_rows_total counter", *rows]
+
+        caches = self.caches()
+        for key, kind, help_text in (("hits", "counter", "Cache hits."), ("misses", "counter", "Cache misses."),
+                                     ("entries", "gauge", "Entries currently cached.")):
+            metric = f"apbd_cache_{key}" + ("_total" if kind == "counter" else "")
+            out += [f"# HELP {metric} {help_text}", f"# TYPE {metric} {kind}"]
+            out += [f'{metric}{{cache="{_label(name)}"}} {stats.get(key, 0)}' for name, stats in caches.items()]
+        return "\n".join(out) + "\n"
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+REGISTRY = Registry()
+stage = REGISTRY.stage
+observe = REGISTRY.observe
+register_cache = REGISTRY.register_cache
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    registry: Registry = REGISTRY
+
+    def do_GET(self) -> None:
+        if self.path.split("?")[0].rstrip("/") != "/metrics":
+            self.send_error(404)
+            return
+        body = self.registry.render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args) -> None:
+        pass
+
+
+def serve(host: str = "127.0.0.1", port: int = 9108) -> ThreadingHTTPServer:
+    """Serve ``GET /metrics`` from a daemon thread; returns the server."""
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="apbd-metrics", daemon=True).start()
+    return server
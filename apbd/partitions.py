@@ -0,0 +1,120 @@
+"""Partitioned dataset layer: one partition per ``(tahun, jenis)``.
+
+Source files are discovered under a data directory (``**/*.csv``). The
+partition(s) of a file come from its name when it carries both a year and a
+jenis (``APBD_2024_Realisasi.csv``); otherwise only the ``tahun`` / ``jenis``
+columns are read once per file version to find them. A file that spans
+several partitions is simply listed under each of them.
+
+Only the partition being viewed is loaded: its files go through the Arrow
+cache and are filtered to the partition's rows, so each partition can be
+cached (and aggregated) independently and adding a year leaves the others
+untouched.
+"""
+from __future__ import annotations
+
+import glob
+import os
+import re
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+import pandas as pd
+
+from apbd import cache, loader
+
+JENIS = ("Anggaran", "Realisasi")
+DEFAULT_JENIS = "Anggaran"
+
+_YEAR = re.compile(r"(?<!\d)((?:19|20)\d{2})(?!\d)")
+
+
+@dataclass(frozen=True)
+class Partition:
+    tahun: int
+    jenis: str
+    paths: tuple[str, ...] = field(default=(), compare=False)
+
+    @property
+    def key(self) -> tuple[int, str]:
+        return (self.tahun, self.jenis)
+
+
+def _from_name(path: str) -> tuple[int | None, str | None]:
+    name = os.path.splitext(os.path.basename(path))[0]
+    year = _YEAR.search(name)
+    jenis = next((j for j in JENIS if j.lower() in name.lower()), None)
+    return (int(year.group(1)) if year else None), jenis
+
+
+@lru_cache(maxsize=1024)
+def _scan_keys(path: str, size: int, mtime_ns: int) -> tuple[tuple[int | None, str | None], ...]:
+    """Distinct ``(tahun, jenis)`` pairs in a file (read once per file version)."""
+    header = pd.read_csv(path, nrows=0)
+    cols = {str(c).strip().lower(): c for c in header.columns}
+    usecols = [cols[c] for c in ("tahun", "jenis") if c in cols]
+    if not usecols:
+        return ((None, None),)
+    df = pd.read_csv(path, usecols=usecols)
+    df.columns = [str(c).strip().lower() for c in df.columns]
+    tahun = pd.to_numeric(df["tahun"], errors="coerce") if "tahun" in df else pd.Series([None] * len(df))
+    jenis = df["jenis"].astype(str).str.strip() if "jenis" in df else pd.Series([None] * len(df))
+    pairs = pd.DataFrame({"tahun": tahun, "jenis": jenis}).drop_duplicates()
+    return tuple(
+        (None if pd.isna(t) else int(t), None if j is None else str(j))
+        for t, j in pairs.itertuples(index=False)
+    )
+
+
+def file_partitions(path: str) -> list[tuple[int, str]]:
+    """``(tahun, jenis)`` partitions a source file contributes to."""
+    year, jenis = _from_name(path)
+    if year is not None and jenis is not None:
+        return [(year, jenis)]
+    st_ = cache.source_stamp(path)
+    keys = []
+    for t, j in _scan_keys(path, st_["size"], st_["mtime_ns"]):
+        t = year if t is None else t
+        j = jenis or j or DEFAULT_JENIS
+        if t is not None and (t, j) not in keys:
+            keys.append((t, j))
+    return keys
+
+
+def discover(data_dir: str) -> list[Partition]:
+    """All partitions under ``data_dir``, newest year first."""
+    found: dict[tuple[int, str], list[str]] = {}
+    for path in sorted(glob.glob(os.path.join(data_dir, "**", "*.csv"), recursive=True)):
+        if f"{os.sep}.cache{os.sep}" in path:
+            continue
+        for key in file_partitions(path):
+            found.setdefault(key, []).append(path)
+    return [
+        Partition(t, j, tuple(paths))
+        for (t, j), paths in sorted(found.items(), key=lambda kv: (-kv[0][0], kv[0][1]))
+    ]
+
+
+def partition_rows(df: pd.DataFrame, path: str, tahun: int, jenis: str) -> pd.DataFrame | None:
+    """Rows of ``df`` (read from ``path``) that belong to ``(tahun, jenis)``;
+    None when the file cannot contribute to that partition."""
+    keep = pd.Series(True, index=df.index)
+    if "tahun" in df.columns:
+        keep &= df["tahun"] == tahun
+    if "jenis" in df.columns:
+        keep &= df["jenis"] == jenis
+    elif jenis != (_from_name(path)[1] or DEFAULT_JENIS):
+        return None
+    return df if keep.all() else df[keep]
+
+
+def load_partition(paths: tuple[str, ...], tahun: int, jenis: str) -> pd.DataFrame:
+    """Long rows of one partition from its (cached) source files."""
+    parts = []
+    for path in paths:
+        rows = partition_rows(cache.load_long(path), path, tahun, jenis)
+        if rows is not None:
+            parts.append(rows)
+    if not parts:
+        raise KeyError(f"Partisi tidak ditemukan: tahun={tahun}, jenis={jenis}")
+    return loader.concat_long(parts)
@@ -0,0 +1,60 @@
+"""Peer-group standing of every pemda on the fiscal ratios.
+
+For each metric in ``PEER_METRICS`` and each peer group — the pemda's
+provinsi, its pulau and the whole country — the percentile rank (0–100,
+ties averaged), the descending rank, the number of peers with a value and
+the z-score within the group are computed once per dataset, next to the
+roll-up cube. Each level is a single grouped pass over all metrics at
+once (integer group ids from ``aggregate.group_codes``), and the result is
+one (rows × levels × stats × metrics) array, so a peer panel for any
+number of pemda is one fancy-index gather.
+"""
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+from apbd import aggregate
+
+# surplus/defisit relative to size: share of total pendapatan
+PEER_METRICS = ["rasio_pad", "rasio_modal", "rasio_operasi", "rasio_surplus"]
+LEVELS = {"provinsi": ["pulau", "provinsi"], "pulau": ["pulau"], "nasional": []}
+STATS = ["persentil", "peringkat", "n", "z"]
+
+
+def metric_values(wide: pd.DataFrame) -> pd.DataFrame:
+    """``PEER_METRICS`` as float64 columns (``rasio_surplus`` derived here)."""
+    out = wide[PEER_METRICS[:3]].astype(np.float64)
+    out["rasio_surplus"] = np.where(wide["total_pendapatan"] > 0,
+                                    wide["surplus_defisit"] / wide["total_pendapatan"], np.nan)
+    return out
+
+
+class PeerTable:
+    """Percentile / rank / peer count / z-score of every row of ``wide``."""
+
+    def __init__(self, wide: pd.DataFrame):
+        values = metric_values(wide)
+        self.values = values.to_numpy()
+        self.stats = np.empty((len(wide), len(LEVELS), len(STATS), len(PEER_METRICS)))
+        for i, keys in enumerate(LEVELS.values()):
+            gid = aggregate.group_codes(wide, keys)[0] if keys else np.zeros(len(wide), dtype=np.int64)
+            g = values.groupby(gid, sort=False)
+            std = g.transform("std")
+            self.stats[:, i, 0] = g.rank(pct=True).to_numpy() * 100
+            self.stats[:, i, 1] = g.rank(ascending=False, method="min").to_numpy()
+            self.stats[:, i, 2] = g.transform("count").to_numpy()
+            # single-member or constant groups have no spread: z is undefined
+            self.stats[:, i, 3] = ((values - g.transform("mean")) / std.where(std > 0)).to_numpy()
+
+    def panel(self, pos: np.ndarray) -> pd.DataFrame:
+        """One row per ``(position, metric)`` for the rows at ``pos``: the
+        metric value (``nilai``) and a ``<level>_<stat>`` column per pair."""
+        pos = np.asarray(pos, dtype=np.int64)
+        k, n_levels, n_stats, n_metrics = len(pos), len(LEVELS), len(STATS), len(PEER_METRICS)
+        stats = self.stats[pos].transpose(0, 3, 1, 2).reshape(k * n_metrics, n_levels * n_stats)
+        out = pd.DataFrame(stats, columns=[f"{lv}_{st}" for lv in LEVELS for st in STATS])
+        out.insert(0, "nilai", self.values[pos].ravel())
+        out.insert(0, "metrik", np.tile(PEER_METRICS, k))
+        out.insert(0, "pos", np.repeat(pos, n_metrics))
+        return out
@@ -0,0 +1,50 @@
+"""Opt-in phase timings for startup and reruns (``APBD_PROFILE=1``).
+
+Phases are recorded from anywhere (app script, loaders, aggregation);
+timed blocks go through ``metrics.stage``, which also calls ``record``.
+Records are kept per thread, between ``begin`` (start of a rerun) and
+``report`` (which prints and clears them): Streamlit runs each session's
+script on its own thread, so concurrent sessions get separate breakdowns,
+and phases timed on threads that never called ``begin`` (the background
+refresher) are not collected. With the flag off ``record`` is a no-op, so
+the hooks can stay in hot paths.
+"""
+from __future__ import annotations
+
+import os
+import sys
+import threading
+
+ENABLED = os.environ.get("APBD_PROFILE", "").lower() in ("1", "true", "yes")
+
+_local = threading.local()
+
+
+def begin() -> None:
+    """Start collecting phases on this thread, dropping any left over from
+    a run that ended without ``report``."""
+    if ENABLED:
+        _local.records = []
+
+
+def record(name: str, seconds: float) -> None:
+    if ENABLED:
+        records = getattr(_local, "records", None)
+        if records is not None:
+            records.append((name, seconds))
+
+
+def report(title: str = "profile", total: float | None = None, stream=sys.stderr) -> list[tuple[str, float]]:
+    """Print this thread's recorded phases (slowest first) and stop collecting."""
+    records = getattr(_local, "records", None) or []
+    _local.records = None
+    if not ENABLED or not records:
+        return records
+    width = max(len(name) for name, _ in records)
+    lines = [f"[apbd] {title}"]
+    for name, seconds in sorted(records, key=lambda r: -r[1]):
+        lines.append(f"  {name:<{width}}  {seconds * 1000:9.1f} ms")
+    if total is not None:
+        lines.append(f"  {'total':<{width}}  {total * 1000:9.1f} ms")
+    print("\n".join(lines), file=stream, flush=True)
+    return records
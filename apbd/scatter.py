@@ -0,0 +1,73 @@
+"""Large-N support for the fiscal-performance scatter.
+
+Above a point budget the scatter is drawn with WebGL (``scattergl``) from an
+outlier-preserving sample chosen on the server:
+
+1. one representative per cell of a 2-D grid over (x, y) — the largest by
+   ``size`` — so the shape of the cloud and sparse regions survive;
+2. every Tukey outlier on x or y (beyond 1.5 IQR);
+3. a seeded random fill of the remaining budget, so dense areas keep their
+   relative density.
+
+Quadrant medians are always computed on the full data.
+"""
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+MAX_POINTS = 5000
+
+
+def medians(df: pd.DataFrame, x: str, y: str) -> tuple[float, float]:
+    """Exact medians of ``x`` and ``y`` (0.0 for an empty frame)."""
+    if not len(df):
+        return 0.0, 0.0
+    return float(df[x].median()), float(df[y].median())
+
+
+def _outliers(v: np.ndarray) -> np.ndarray:
+    q1, q3 = np.percentile(v, [25, 75])
+    iqr = q3 - q1
+    return (v < q1 - 1.5 * iqr) | (v > q3 + 1.5 * iqr)
+
+
+def _cell_ids(v: np.ndarray, bins: int) -> np.ndarray:
+    lo, hi = v.min(), v.max()
+    if hi <= lo:
+        return np.zeros(len(v), dtype=np.int64)
+    return np.minimum(((v - lo) / (hi - lo) * bins).astype(np.int64), bins - 1)
+
+
+def downsample(df: pd.DataFrame, x: str, y: str, max_points: int = MAX_POINTS,
+               size: str | None = None, seed: int = 0) -> pd.DataFrame:
+    """At most ``max_points`` rows of ``df`` (rows without NaN in x/y),
+    keeping grid representatives and outliers first; original order kept."""
+    n = len(df)
+    if n <= max_points:
+        return df
+    xv = df[x].to_numpy(dtype=np.float64)
+    yv = df[y].to_numpy(dtype=np.float64)
+    weight = df[size].to_numpy(dtype=np.float64) if size else np.zeros(n)
+
+    # cell representatives take at most half of the budget
+    bins = max(1, int(np.sqrt(max_points / 2)))
+    cell = _cell_ids(xv, bins) * bins + _cell_ids(yv, bins)
+    order = np.lexsort((-weight, cell))
+    first = np.r_[True, cell[order][1:] != cell[order][:-1]]
+    reps = order[first]
+
+    picked = np.zeros(n, dtype=bool)
+    picked[reps] = True
+    outliers = np.flatnonzero((_outliers(xv) | _outliers(yv)) & ~picked)
+    rng = np.random.default_rng(seed)
+    budget = max_points - int(picked.sum())
+    if len(outliers) > budget:
+        outliers = rng.choice(outliers, budget, replace=False)
+    picked[outliers] = True
+
+    budget = max_points - int(picked.sum())
+    if budget > 0:
+        rest = np.flatnonzero(~picked)
+        picked[rng.choice(rest, min(budget, len(rest)), replace=False)] = True
+    return df.iloc[np.flatnonzero(picked)]
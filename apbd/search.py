@@ -0,0 +1,140 @@
+"""Precomputed search index for the sidebar "Cari daerah / provinsi" box.
+
+Each row of the wide table gets one normalized key (daerah + provinsi +
+pulau, lowercased, accents stripped, punctuation folded to spaces and
+common abbreviations canonicalized, so "kabupaten bogor" and "kab bogor"
+both hit "Kab. Bogor"). Lookups go through a trigram posting index instead
+of scanning every row; queries shorter than a trigram are plain substring
+scans over the keys (a few thousand short strings):
+
+1. the whole query as a substring of the key (the original behaviour);
+2. otherwise every query token as a substring of the key;
+3. otherwise (``fuzzy=True``) the rows sharing the most query trigrams,
+   if they share at least ``FUZZY_MIN_SCORE`` of them.
+"""
+from __future__ import annotations
+
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+SEARCH_COLS = ("daerah", "provinsi", "pulau")
+
+# long form -> canonical short form, applied to both keys and queries
+ABBREV = {
+    "kabupaten": "kab",
+    "provinsi": "prov",
+    "propinsi": "prov",
+    "kepulauan": "kep",
+}
+FUZZY_MIN_SCORE = 0.5
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+
+def _canonical(token: str) -> str:
+    if token in ABBREV:
+        return ABBREV[token]
+    # a partially typed long form ("kabupa") means the same as the short one
+    for long, short in ABBREV.items():
+        if len(token) > len(short) and long.startswith(token):
+            return short
+    return token
+
+
+def normalize(text: str) -> str:
+    """Lowercase, strip accents/punctuation and canonicalize abbreviations."""
+    text = unicodedata.normalize("NFKD", str(text).lower())
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return " ".join(_canonical(t) for t in _NON_ALNUM.sub(" ", text).split())
+
+
+def _trigrams(text: str) -> set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _normalized_column(col: pd.Series) -> np.ndarray:
+    """Normalize each distinct value once (categories) and gather per row."""
+    if isinstance(col.dtype, pd.CategoricalDtype):
+        cats = np.array([normalize(c) for c in col.cat.categories] + [""], dtype=object)
+        return cats[col.cat.codes.to_numpy()]
+    return np.array([normalize(v) if isinstance(v, str) else "" for v in col], dtype=object)
+
+
+class SearchIndex:
+    """Row-position search over a wide table; build once per dataset."""
+
+    def __init__(self, wide: pd.DataFrame, cols: tuple[str, ...] = SEARCH_COLS):
+        parts = [_normalized_column(wide[c]) for c in cols]
+        self.keys: list[str] = [" ".join(p for p in row if p) for row in zip(*parts)]
+
+        postings: dict[str, list[int]] = {}
+        for i, key in enumerate(self.keys):
+            for g in _trigrams(key):
+                postings.setdefault(g, []).append(i)
+        self._postings = {g: np.asarray(rows, dtype=np.int32) for g, rows in postings.items()}
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _candidates(self, text: str) -> np.ndarray | None:
+        """Rows whose key may contain ``text`` (None = no index constraint)."""
+        if len(text) < 3:
+            return None  # no trigram to look up
+        lists = []
+        for g in _trigrams(text):
+            rows = self._postings.get(g)
+            if rows is None:
+                return np.empty(0, dtype=np.int32)
+            lists.append(rows)
+        lists.sort(key=len)
+        out = lists[0]
+        for rows in lists[1:]:
+            out = np.intersect1d(out, rows, assume_unique=True)
+            if not len(out):
+                break
+        return out
+
+    def _contains(self, text: str) -> np.ndarray:
+        cand = self._candidates(text)
+        if cand is None:
+            cand = np.arange(len(self.keys), dtype=np.int32)
+        keys = self.keys
+        return np.asarray([i for i in cand if text in keys[i]], dtype=np.int32)
+
+    def _fuzzy(self, text: str, min_score: float) -> np.ndarray:
+        grams = [self._postings[g] for g in _trigrams(text) if g in self._postings]
+        n_grams = len(_trigrams(text))
+        if not grams or not n_grams:
+            return np.empty(0, dtype=np.int32)
+        score = np.bincount(np.concatenate(grams), minlength=len(self.keys))
+        best = score.max()
+        if best < min_score * n_grams:
+            return np.empty(0, dtype=np.int32)
+        return np.flatnonzero(score == best).astype(np.int32)
+
+    def search(self, query: str, fuzzy: bool = True, min_score: float = FUZZY_MIN_SCORE) -> np.ndarray:
+        """Sorted row positions matching ``query`` (all rows for a blank query)."""
+        text = normalize(query)
+        if not text:
+            return np.arange(len(self.keys), dtype=np.int32)
+        hits = self._contains(text)
+        if not len(hits):
+            tokens = text.split()
+            if len(tokens) > 1:
+                hits = self._contains(tokens[0])
+                for tok in tokens[1:]:
+                    if not len(hits):
+                        break
+                    hits = np.intersect1d(hits, self._contains(tok), assume_unique=True)
+        if not len(hits) and fuzzy:
+            hits = self._fuzzy(text, min_score)
+        return np.sort(hits)
+
+    def mask(self, query: str, **kwargs) -> np.ndarray:
+        """Boolean row mask for ``query``."""
+        out = np.zeros(len(self.keys), dtype=bool)
+        out[self.search(query, **kwargs)] = True
+        return out
@@ -0,0 +1,254 @@
+"""Host-wide shared dataset: one publisher process, many read-only replicas.
+
+Every Streamlit replica running its own ``Refresher`` parses the CSVs and
+holds a private copy of the long and wide tables. Instead, one publisher
+builds them and writes each partition as uncompressed Arrow IPC files to a
+shared directory (ideally tmpfs, e.g. ``/dev/shm/apbd``)::
+
+    python -m apbd.shared data/ --dir /dev/shm/apbd [--interval 10]
+
+and replicas started with ``APBD_SHARED_DIR=/dev/shm/apbd`` memory-map
+those files read-only. Numeric columns and categorical codes become views
+of the mapped pages, so N replicas on a host share one physical copy (only
+the small category dictionaries, the roll-up cube and the peer table are
+per process).
+
+Swaps are version-stamped: a rebuilt partition is written under a new
+generation number (``2023_anggaran.g7.wide.arrow``) and then published by
+atomically replacing ``manifest.json``. Replicas ``stat`` the manifest on
+each snapshot request and attach the new files when the generation moved;
+sessions already holding the previous snapshot keep using it (its mapping
+stays valid after the publisher unlinks the file). Files of the previous
+generation are kept one round so replicas that just read the old manifest
+can still open them.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from apbd import aggregate, cache, incremental, partitions, peers, watcher
+
+log = logging.getLogger(__name__)
+
+MANIFEST = "manifest.json"
+TABLES = ("long", "wide")
+
+
+def _stem(tahun: int, jenis: str, generation: int) -> str:
+    return f"{tahun}_{jenis.lower()}.g{generation}"
+
+
+def read_manifest(directory: str) -> dict | None:
+    try:
+        with open(os.path.join(directory, MANIFEST), encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+
+def attach(path: str) -> pd.DataFrame:
+    """Memory-map an Arrow IPC file as a DataFrame backed by the mapping.
+
+    Files hold a single record batch, so columns are contiguous, and
+    ``split_blocks`` keeps one block per column so pandas does not
+    consolidate (copy) same-dtype columns: null-free numeric columns and
+    dictionary indices are then used in place, read-only."""
+    table = pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+    return table.to_pandas(split_blocks=True)
+
+
+class Publisher:
+    """Writes every partition's snapshot to ``directory`` when it changes."""
+
+    def __init__(self, data_dir: str, directory: str, interval: float = 10.0):
+        self.directory = directory
+        self.interval = interval
+        self.refresher = watcher.Refresher(data_dir, interval)
+        os.makedirs(directory, exist_ok=True)
+        prev = read_manifest(directory) or {}
+        # generations keep increasing across publisher restarts
+        self.generation = int(prev.get("generation", 0))
+        self._published: dict[tuple[int, str], tuple[tuple[int, float], dict]] = {}
+        # the manifest on disk may still be read by replicas: keep its files
+        # through the first cleanup after a restart
+        self._previous_files: set[str] = {f for entry in prev.get("partitions", [])
+                                          for f in entry["files"].values()}
+
+    def _write(self, part: partitions.Partition, snap: incremental.Snapshot) -> dict:
+        stem = _stem(part.tahun, part.jenis, self.generation)
+        files = {}
+        for name, df in (("long", snap.long), ("wide", snap.wide)):
+            path = os.path.join(self.directory, f"{stem}.{name}.arrow")
+            tmp = f"{path}.{os.getpid()}.tmp"
+            feather.write_feather(df, tmp, compression="uncompressed", chunksize=max(1, len(df)))
+            os.replace(tmp, path)
+            files[name] = os.path.basename(path)
+        return {
+            "tahun": part.tahun,
+            "jenis": part.jenis,
+            "paths": list(part.paths),
+            "version": self.generation,
+            "built_at": snap.built_at,
+            "rows": len(snap.long),
+            "pemda": len(snap.wide),
+            "files": files,
+        }
+
+    def publish(self) -> bool:
+        """One round: refresh, write changed partitions, swap the manifest.
+        Returns whether anything was published."""
+        self.refresher.scan()
+        parts = self.refresher.partitions()
+        changed = [(p, self.refresher.snapshot(p)) for p in parts]
+        changed = [(p, s) for p, s in changed
+                   if self._published.get(p.key, (None,))[0] != (s.version, s.built_at)]
+        keys = {p.key for p in parts}
+        if not changed and keys == set(self._published):
+            return False
+
+        self.generation += 1
+        for part, snap in changed:
+            self._published[part.key] = ((snap.version, snap.built_at), self._write(part, snap))
+        for key in set(self._published) - keys:
+            del self._published[key]
+        entries = [entry for _, entry in (self._published[p.key] for p in parts)]
+        cache._write_json_atomic(os.path.join(self.directory, MANIFEST), {
+            "generation": self.generation,
+            "published_at": time.time(),
+            "partitions": entries,
+        })
+
+        # drop files no longer referenced by this or the previous manifest
+        current = {f for entry in entries for f in entry["files"].values()}
+        for name in os.listdir(self.directory):
+            if name.endswith(".arrow") and name not in current and name not in self._previous_files:
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
+        self._previous_files = current
+        return True
+
+    def run(self) -> None:
+        while True:
+            try:
+                if self.publish():
+                    log.info("published generation %d", self.generation)
+            except Exception:  # keep the last good generation published
+                log.exception("publish failed")
+            time.sleep(self.interval)
+
+
+class SharedRefresher:
+    """Read-only stand-in for ``watcher.Refresher`` backed by a publisher's
+    directory (same ``partitions`` / ``snapshot`` / ``status`` interface)."""
+
+    def __init__(self, directory: str, interval: float = 10.0):
+        self.directory = directory
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._stamp: tuple[int, int] | None = None
+        self._manifest: dict = {}
+        self._snapshots: dict[tuple[int, str], incremental.Snapshot] = {}
+        self.last_scan = time.time()
+        self.last_error: str | None = None
+        self.scans = 0
+
+    def _refresh_manifest(self) -> dict:
+        """The manifest, re-read only when its size/mtime changed."""
+        path = os.path.join(self.directory, MANIFEST)
+        try:
+            st_ = os.stat(path)
+        except OSError as exc:
+            self.last_error = f"manifest tidak ditemukan: {exc}"
+            return self._manifest
+        stamp = (st_.st_size, st_.st_mtime_ns)
+        if stamp != self._stamp:
+            manifest = read_manifest(self.directory)
+            if manifest is not None:
+                self._manifest, self._stamp = manifest, stamp
+                self.last_error = None
+            self.scans += 1
+        self.last_scan = time.time()
+        return self._manifest
+
+    def _entries(self) -> dict[tuple[int, str], dict]:
+        with self._lock:
+            manifest = self._refresh_manifest()
+        return {(e["tahun"], e["jenis"]): e for e in manifest.get("partitions", [])}
+
+    def start(self) -> "SharedRefresher":
+        return self
+
+    def stop(self) -> None:
+        pass
+
+    def partitions(self) -> list[partitions.Partition]:
+        return [partitions.Partition(t, j, tuple(e["paths"])) for (t, j), e in self._entries().items()]
+
+    def snapshot(self, part: partitions.Partition) -> incremental.Snapshot:
+        """Snapshot of ``part`` attached from the latest published generation."""
+        entry = self._entries().get(part.key)
+        with self._lock:
+            snap = self._snapshots.get(part.key)
+            if entry is None:
+                if snap is None:
+                    raise KeyError(f"partisi {part.key} belum dipublikasikan di {self.directory}")
+                return snap
+            if snap is None or snap.version != entry["version"]:
+                try:
+                    long, wide = (attach(os.path.join(self.directory, entry["files"][t])) for t in TABLES)
+                except (OSError, pa.ArrowException) as exc:
+                    # superseded while we read the manifest; serve what we have
+                    if snap is None:
+                        raise
+                    self.last_error = f"{type(exc).__name__}: {exc}"
+                    return snap
+                snap = incremental.Snapshot(entry["version"], long, wide, aggregate.build_cube(wide),
+                                            peers.PeerTable(wide), entry["built_at"])
+                self._snapshots[part.key] = snap
+            return snap
+
+    def status(self) -> dict:
+        self._entries()
+        return {
+            "running": bool(self._manifest),
+            "interval": self.interval,
+            "last_scan": self.last_scan,
+            "scans": self.scans,
+            "last_error": self.last_error,
+            "partitions": {
+                f"{t} {j}": {"version": s.version, "built_at": s.built_at, "rows": len(s.long), "pemda": len(s.wide)}
+                for (t, j), s in sorted(self._snapshots.items())
+            },
+        }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Publish APBD partitions for replicas to memory-map.")
+    ap.add_argument("data_dir", nargs="?", default=os.environ.get("APBD_DATA_DIR", "data"))
+    ap.add_argument("--dir", default=os.environ.get("APBD_SHARED_DIR", "/dev/shm/apbd"))
+    ap.add_argument("--interval", type=float, default=float(os.environ.get("APBD_REFRESH_SECONDS", "10")))
+    ap.add_argument("--once", action="store_true", help="publish once and exit")
+    args = ap.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    publisher = Publisher(args.data_dir, args.dir, args.interval)
+    if args.once:
+        publisher.publish()
+        print(f"generation {publisher.generation} in {args.dir}")
+        return
+    publisher.run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""Bounded-memory ingestion: CSV chunks folded straight into the wide table.
+
+``load_long`` + ``build_wide`` hold the whole long table (and, while
+normalizing, string copies of its columns). For multi-GB exports this reads
+the file ``chunksize`` rows at a time with ``usecols`` and categorical
+dtypes, classifies each chunk with the same rules as ``build_wide`` and adds
+its per-pemda sums into running totals keyed by ``(daerah, provinsi,
+pulau)``. Peak memory is one chunk plus the running totals; the result
+equals ``build_wide(load_long(path))``.
+
+    python -m apbd.stream data/APBD_2023.csv [--chunksize 200000] [--tahun 2023 --jenis Anggaran]
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from apbd import aggregate, loader
+
+CHUNKSIZE = 200_000
+STR_COLS = ["daerah", "provinsi", "pulau", "level1", "level2"]
+ALIASES = {"namapemda": "daerah", "nama_pemda": "daerah", "pemda": "daerah"}
+
+
+def _columns(path: str) -> dict[str, str]:
+    """Normalized name → raw header name for the columns ingestion needs."""
+    header = pd.read_csv(path, nrows=0).columns
+    wanted = loader.REQUIRED_COLS | {"tahun", "jenis"}
+    out = {}
+    for raw in header:
+        name = str(raw).strip().lower().replace(" ", "_")
+        name = ALIASES.get(name, name)
+        if name in wanted and name not in out:
+            out[name] = raw
+    missing = sorted(loader.REQUIRED_COLS - set(out))
+    if missing:
+        raise KeyError(
+            "Kolom wajib tidak ditemukan: "
+            + ", ".join(missing)
+            + f". Kolom yang ada: {list(header)}"
+        )
+    return out
+
+
+def _strip_categorical(col: pd.Series) -> pd.Series:
+    """``astype(str).str.strip()`` applied to the categories only."""
+    cats = pd.Index(col.cat.categories.astype(str).str.strip().tolist() + ["nan"])
+    inverse, uniques = pd.factorize(cats)
+    codes = inverse[col.cat.codes.to_numpy()]  # code -1 (NaN) picks "nan"
+    return pd.Series(pd.Categorical.from_codes(codes, categories=uniques), index=col.index)
+
+
+class WideAccumulator:
+    """Running per-pemda money totals and presence over any number of chunks."""
+
+    def __init__(self):
+        self._ids: dict[tuple[str, str, str], int] = {}
+        self._totals = np.zeros((1024, len(aggregate.MONEY_COLS)))
+        self._present = np.zeros(1024, dtype=bool)
+        self.rows = 0
+
+    def _grow(self, n: int) -> None:
+        if n <= len(self._present):
+            return
+        size = max(n, 2 * len(self._present))
+        totals = np.zeros((size, self._totals.shape[1]))
+        totals[:len(self._totals)] = self._totals
+        present = np.zeros(size, dtype=bool)
+        present[:len(self._present)] = self._present
+        self._totals, self._present = totals, present
+
+    def add(self, chunk: pd.DataFrame) -> None:
+        """Fold a normalized long chunk into the totals."""
+        self.rows += len(chunk)
+        gid, key_table = aggregate.group_codes(chunk)
+        pair_codes, membership = aggregate.classify_labels(chunk["level1"], chunk["level2"])
+        n_groups, n_pairs = len(key_table), membership.shape[0]
+
+        valid = gid >= 0
+        cell = gid[valid] * n_pairs + pair_codes[valid]
+        nilai = np.asarray(chunk["nilai"], dtype=np.float64)[valid]
+        sums = np.bincount(cell, weights=nilai, minlength=n_groups * n_pairs).reshape(n_groups, n_pairs)
+        counts = np.bincount(cell, minlength=n_groups * n_pairs).reshape(n_groups, n_pairs)
+
+        # chunk groups → running ids (a loop over groups, not rows)
+        keys = zip(*(key_table[k].astype(str) for k in aggregate.KEYS))
+        ids = np.array([self._ids.setdefault(k, len(self._ids)) for k in keys], dtype=np.int64)
+        self._grow(len(self._ids))
+        np.add.at(self._totals, ids, sums @ membership.astype(np.float64))
+        self._present[ids] |= (counts @ membership[:, :2].astype(np.int64)).sum(axis=1) > 0
+
+    def partial(self) -> tuple[list[tuple[str, str, str]], np.ndarray, np.ndarray]:
+        """Compact picklable state: ``(keys, totals, present)``."""
+        n = len(self._ids)
+        return list(self._ids), self._totals[:n].copy(), self._present[:n].copy()
+
+    def merge(self, partial: tuple[list[tuple[str, str, str]], np.ndarray, np.ndarray]) -> None:
+        """Fold another accumulator's ``partial()`` into this one."""
+        keys, totals, present = partial
+        ids = np.array([self._ids.setdefault(k, len(self._ids)) for k in keys], dtype=np.int64)
+        self._grow(len(self._ids))
+        np.add.at(self._totals, ids, totals)
+        self._present[ids] |= present
+
+    def wide(self) -> pd.DataFrame:
+        """The wide table, in ``build_wide`` order and dtypes."""
+        n = len(self._ids)
+        keys = pd.DataFrame(list(self._ids), columns=aggregate.KEYS)
+        present = self._present[:n]
+        totals = self._totals[:n][present]
+        gid, key_table = aggregate.group_codes(keys[present].reset_index(drop=True))
+        order = np.argsort(gid, kind="stable")
+        wide = key_table.copy()
+        for j, col in enumerate(aggregate.MONEY_COLS):
+            wide[col] = totals[order, j]
+        return aggregate.add_derived(wide)
+
+
+def iter_chunks(path: str, chunksize: int = CHUNKSIZE, tahun: int | None = None, jenis: str | None = None):
+    """Normalized long chunks of ``path`` (only the columns aggregation needs),
+    optionally restricted to one ``(tahun, jenis)``."""
+    cols = _columns(path)
+    usecols = [c for n, c in cols.items() if n in loader.REQUIRED_COLS
+               or (n == "tahun" and tahun is not None) or (n == "jenis" and jenis is not None)]
+    dtype = {cols[n]: "category" for n in STR_COLS + ["jenis"] if n in cols and cols[n] in usecols}
+    rename = {raw: name for name, raw in cols.items()}
+    for chunk in pd.read_csv(path, usecols=usecols, dtype=dtype, chunksize=chunksize):
+        chunk = chunk.rename(columns=rename)
+        if tahun is not None and "tahun" in chunk:
+            chunk = chunk[chunk["tahun"] == tahun]
+        if jenis is not None and "jenis" in chunk:
+            chunk = chunk[chunk["jenis"] == jenis]
+        for c in STR_COLS:
+            chunk[c] = _strip_categorical(chunk[c])
+        chunk["nilai"] = pd.to_numeric(chunk["nilai"], errors="coerce").fillna(0.0)
+        yield chunk
+
+
+def build_wide(path: str, chunksize: int = CHUNKSIZE, tahun: int | None = None, jenis: str | None = None) -> pd.DataFrame:
+    """``aggregate.build_wide(load_long(path))`` without holding the long table."""
+    acc = WideAccumulator()
+    for chunk in iter_chunks(path, chunksize, tahun, jenis):
+        acc.add(chunk)
+    return acc.wide()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description="Build the wide table from a CSV in bounded memory.")
+    ap.add_argument("path")
+    ap.add_argument("--chunksize", type=int, default=CHUNKSIZE)
+    ap.add_argument("--tahun", type=int)
+    ap.add_argument("--jenis")
+    ap.add_argument("--out", help="write the wide table here (.csv or .parquet)")
+    args = ap.parse_args()
+
+    t0 = time.perf_counter()
+    wide = build_wide(args.path, args.chunksize, args.tahun, args.jenis)
+    print(f"{len(wide):,} pemda in {time.perf_counter() - t0:.2f} s")
+    if args.out:
+        (wide.to_parquet if args.out.endswith(".parquet") else wide.to_csv)(args.out, index=False)
+        print(f"written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
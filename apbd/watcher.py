@@ -0,0 +1,120 @@
+"""Background refresher: keeps every partition's snapshot warm off the
+request path.
+
+A daemon thread polls the data directory every ``interval`` seconds
+(``stat`` calls only — no extra dependency like inotify/watchdog). It picks
+up new files and partitions, lets each ``PartitionBuilder`` apply appends or
+edits, and publishes the resulting snapshots in a dict whose values are
+swapped by reference. Request handlers only read that dict; they never parse
+or aggregate unless a partition has not been built at all yet.
+
+Partitions stay lazy: the thread warms the newest partition (the sidebar
+default) and keeps refreshing the ones that have been requested since.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+
+from apbd import incremental, partitions
+
+log = logging.getLogger(__name__)
+
+Key = tuple[int, str]
+
+
+class Refresher:
+    """Discovers partitions and keeps their snapshots current."""
+
+    def __init__(self, data_dir: str, interval: float = 10.0):
+        self.data_dir = data_dir
+        self.interval = interval
+        self._parts: list[partitions.Partition] = partitions.discover(data_dir)
+        self._builders: dict[Key, incremental.PartitionBuilder] = {}
+        self._snapshots: dict[Key, incremental.Snapshot] = {}
+        self._key_locks: dict[Key, threading.Lock] = {}
+        self._active: set[Key] = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self.last_scan = time.time()
+        self.last_error: str | None = None
+        self.scans = 0
+
+    # -- building -----------------------------------------------------------
+    def _key_lock(self, key: Key) -> threading.Lock:
+        with self._lock:
+            return self._key_locks.setdefault(key, threading.Lock())
+
+    def _build(self, part: partitions.Partition) -> incremental.Snapshot:
+        """Create/refresh the builder of ``part`` and publish its snapshot."""
+        with self._key_lock(part.key):
+            builder = self._builders.get(part.key)
+            if builder is None or builder.paths != part.paths:
+                # new partition or a file was added/removed: full build, the
+                # old snapshot (if any) keeps being served meanwhile
+                prev = self._snapshots.get(part.key)
+                builder = incremental.PartitionBuilder(
+                    part.paths, part.tahun, part.jenis, version=prev.version + 1 if prev else 1,
+                )
+                self._builders[part.key] = builder
+                snap = builder.current
+            else:
+                snap = builder.refresh()
+            self._snapshots[part.key] = snap
+            return snap
+
+    def scan(self) -> None:
+        """One refresh round over every partition (what the thread runs)."""
+        self._parts = partitions.discover(self.data_dir)
+        for i, part in enumerate(self._parts):
+            if i == 0 or part.key in self._active:
+                self._build(part)
+        self.last_scan = time.time()
+        self.scans += 1
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.scan()
+                self.last_error = None
+            except Exception as exc:  # keep serving the last good snapshots
+                log.exception("refresh failed")
+                self.last_error = f"{type(exc).__name__}: {exc}"
+            self._stop.wait(self.interval)
+
+    # -- public -------------------------------------------------------------
+    def start(self) -> "Refresher":
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="apbd-refresher", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def partitions(self) -> list[partitions.Partition]:
+        return list(self._parts)
+
+    def snapshot(self, part: partitions.Partition) -> incremental.Snapshot:
+        """Current snapshot of ``part``; builds it on the caller's thread only
+        if the refresher has not got to it yet."""
+        self._active.add(part.key)
+        snap = self._snapshots.get(part.key)
+        if snap is not None:
+            return snap
+        return self._build(part)
+
+    def status(self) -> dict:
+        return {
+            "running": self._thread is not None and self._thread.is_alive(),
+            "interval": self.interval,
+            "last_scan": self.last_scan,
+            "scans": self.scans,
+            "last_error": self.last_error,
+            "partitions": {
+                f"{t} {j}": {"version": s.version, "built_at": s.built_at, "rows": len(s.long), "pemda": len(s.wide)}
+                for (t, j), s in sorted(self._snapshots.items())
+            },
+        }
@@ -1,8 +1,21 @@
+import time
+_t_start = time.perf_counter()
+
 import streamlit as st
 import pandas as pd
 import numpy as np
+import os
+import tempfile
 import textwrap
-import plotly.express as px
+from urllib.parse import urlencode
+
+# plotly is imported inside the figure builders: it is only needed once a
+# chart is actually drawn (and figures are memoized), not for first paint
+from apbd import accounts, breakdown, export, figcache, filters, formatting, metrics, profiling, ranking, scatter, shared, watcher
+from apbd.formatting import fmt_idr, fmt_pct
+
+profiling.begin()
+profiling.record("imports", time.perf_counter() - _t_start)
 
 # =========================================================
 # Config
@@ -17,6 +30,7 @@ st.set_page_config(
 # =========================================================
 # CSS (UI polish + micro-animations)
 # =========================================================
+_t_css = time.perf_counter()
 st.markdown(
     """
 <style>
@@ -137,27 +151,25 @@ hr {margin: 0.8rem 0 1.0rem 0; opacity: .25}
 """,
     unsafe_allow_html=True,
 )
+profiling.record("css", time.perf_counter() - _t_css)
 
 # =========================================================
 # Helpers
 # =========================================================
-def fmt_idr(x: float) -> str:
-    if pd.isna(x):
-        return "Rp 0"
-    x = float(x)
-    absx = abs(x)
-    if absx >= 1e12:
-        return f"Rp {x/1e12:,.2f} T"
-    if absx >= 1e9:
-        return f"Rp {x/1e9:,.2f} M"
-    if absx >= 1e6:
-        return f"Rp {x/1e6:,.2f} Jt"
-    return f"Rp {x:,.0f}"
-
-def fmt_pct(x: float) -> str:
-    if pd.isna(x) or np.isinf(x):
-        return "-"
-    return f"{x*100:.1f}%"
+def number_table(view: pd.DataFrame, money_cols: list[str], pct_cols: list[str]):
+    """st.dataframe that keeps money/ratio columns numeric (sortable, no string
+    copies): money is scaled to one unit per column (named in the header,
+    picked from a low quantile so small pemda keep their digits)."""
+    view = view.copy()
+    config = {}
+    for c in money_cols:
+        divisor, unit = formatting.money_unit(view[c])
+        view[c] = view[c].astype(float) / divisor
+        config[c] = st.column_config.NumberColumn(f"{c} (Rp {unit})" if unit else f"{c} (Rp)", format="%.2f" if unit else "%.0f")
+    for c in pct_cols:
+        view[c] = view[c].astype(float) * 100
+        config[c] = st.column_config.NumberColumn(c, format="%.1f%%")
+    st.dataframe(view, column_config=config, use_container_width=True, hide_index=True)
 
 def pick_col(df: pd.DataFrame, candidates: list[str]) -> str:
     cols = {c.lower(): c for c in df.columns}
@@ -166,93 +178,74 @@ def pick_col(df: pd.DataFrame, candidates: list[str]) -> str:
             return cols[cand.lower()]
     raise KeyError(f"Kolom tidak ditemukan. Cari salah satu dari: {candidates}. Kolom yang ada: {list(df.columns)}")
 
-@st.cache_data(show_spinner=False)
-def load_long(path: str) -> pd.DataFrame:
-    df = pd.read_csv(path)
-
-    # normalize colnames
-    df.columns = [str(c).strip().lower().replace(" ", "_") for c in df.columns]
-
-    # minimal compatibility for similar datasets
-    ren = {}
-    if "namapemda" in df.columns: ren["namapemda"] = "daerah"
-    if "nama_pemda" in df.columns: ren["nama_pemda"] = "daerah"
-    if "pemda" in df.columns: ren["pemda"] = "daerah"
-    df = df.rename(columns=ren)
-
-    required = {"daerah", "provinsi", "pulau", "level1", "level2", "nilai"}
-    missing = sorted(list(required - set(df.columns)))
-    if missing:
-        raise KeyError(
-            "Kolom wajib tidak ditemukan: "
-            + ", ".join(missing)
-            + f". Kolom yang ada: {list(df.columns)}"
-        )
-
-    df["daerah"] = df["daerah"].astype(str).str.strip()
-    df["provinsi"] = df["provinsi"].astype(str).str.strip()
-    df["pulau"] = df["pulau"].astype(str).str.strip()
-    df["level1"] = df["level1"].astype(str).str.strip()
-    df["level2"] = df["level2"].astype(str).str.strip()
-    df["nilai"] = pd.to_numeric(df["nilai"], errors="coerce").fillna(0.0)
-
-    return df
-
-@st.cache_data(show_spinner=False)
-def build_wide(df_long: pd.DataFrame) -> pd.DataFrame:
-    pendapatan = (
-        df_long[df_long["level1"].str.contains("Pendapatan", case=False, na=False)]
-        .groupby(["daerah", "provinsi", "pulau"], as_index=False)["nilai"].sum()
-        .rename(columns={"nilai": "total_pendapatan"})
-    )
-    belanja = (
-        df_long[df_long["level1"].str.contains("Belanja", case=False, na=False)]
-        .groupby(["daerah", "provinsi", "pulau"], as_index=False)["nilai"].sum()
-        .rename(columns={"nilai": "total_belanja"})
-    )
-
-    pad = (
-        df_long[
-            (df_long["level1"].str.contains("Pendapatan", case=False, na=False))
-            & (df_long["level2"].str.contains("PAD", case=False, na=False))
-        ]
-        .groupby(["daerah", "provinsi", "pulau"], as_index=False)["nilai"].sum()
-        .rename(columns={"nilai": "pad"})
-    )
-
-    def belanja_comp(keyword: str, out_col: str) -> pd.DataFrame:
-        return (
-            df_long[
-                (df_long["level1"].str.contains("Belanja", case=False, na=False))
-                & (df_long["level2"].str.contains(keyword, case=False, na=False))
-            ]
-            .groupby(["daerah", "provinsi", "pulau"], as_index=False)["nilai"].sum()
-            .rename(columns={"nilai": out_col})
-        )
-
-    b_operasi = belanja_comp("Belanja Operasi", "belanja_operasi")
-    b_modal = belanja_comp("Belanja Modal", "belanja_modal")
-    b_tidak = belanja_comp("Belanja Tidak Terduga", "belanja_tidak_terduga")
-    b_transfer = belanja_comp("Belanja Transfer", "belanja_transfer")
-
-    wide = pendapatan.merge(belanja, on=["daerah", "provinsi", "pulau"], how="outer")
-    for part in [pad, b_operasi, b_modal, b_tidak, b_transfer]:
-        wide = wide.merge(part, on=["daerah", "provinsi", "pulau"], how="left")
-
-    for c in ["total_pendapatan", "total_belanja", "pad",
-              "belanja_operasi", "belanja_modal", "belanja_tidak_terduga", "belanja_transfer"]:
-        if c not in wide.columns:
-            wide[c] = 0.0
-        wide[c] = pd.to_numeric(wide[c], errors="coerce").fillna(0.0)
-
-    wide["surplus_defisit"] = wide["total_pendapatan"] - wide["total_belanja"]
-
-    # ratios
-    wide["rasio_pad"] = np.where(wide["total_pendapatan"] > 0, wide["pad"] / wide["total_pendapatan"], np.nan)
-    wide["rasio_modal"] = np.where(wide["total_belanja"] > 0, wide["belanja_modal"] / wide["total_belanja"], np.nan)
-    wide["rasio_operasi"] = np.where(wide["total_belanja"] > 0, wide["belanja_operasi"] / wide["total_belanja"], np.nan)
-
-    return wide
+@st.cache_resource(show_spinner=False)
+def refresher(data_dir: str, shared_dir: str = "") -> watcher.Refresher | shared.SharedRefresher:
+    """One background refresher per process: discovers partitions, applies file
+    changes incrementally and publishes snapshots off the request path. With
+    ``shared_dir`` the tables are memory-mapped from an ``apbd.shared``
+    publisher instead, so replicas on one host share a single copy."""
+    interval = float(os.environ.get("APBD_REFRESH_SECONDS", "10"))
+    if shared_dir:
+        return shared.SharedRefresher(shared_dir, interval)
+    return watcher.Refresher(data_dir, interval).start()
+
+# Per-dataset resources are keyed by the snapshot token (tahun, jenis, version)
+# and take the frames as unhashed ``_`` arguments: Streamlit would otherwise
+# hash the whole table on every call of every rerun. max_entries lets old
+# versions (and the tables they reference) go once the refresher moves on.
+@st.cache_resource(show_spinner=False, max_entries=8)
+def filter_cache(token: tuple, _wide: pd.DataFrame) -> filters.FilterCache:
+    """Filter results shared by all sessions (bounded LRU of row positions)."""
+    return filters.FilterCache(_wide)
+
+@st.cache_resource(show_spinner=False)
+def figure_cache() -> figcache.FigureCache:
+    """Built Plotly figures shared by all sessions, bounded by serialized size."""
+    return figcache.FigureCache(max_bytes=int(os.environ.get("APBD_FIGURE_CACHE_MB", "128")) * 2**20)
+
+SCATTER_MAX_POINTS = int(os.environ.get("APBD_SCATTER_MAX_POINTS", str(scatter.MAX_POINTS)))
+
+def show_chart(key: tuple, build) -> None:
+    """st.plotly_chart for a figure memoized on ``key`` (dataset, filters, widgets);
+    ``build`` only runs when that combination has not been drawn yet."""
+    with metrics.stage(f"chart {key[0]}"):
+        st.plotly_chart(figure_cache().get(key, build), use_container_width=True)
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def account_tree(token: tuple, _df_long: pd.DataFrame, _wide: pd.DataFrame) -> accounts.AccountTree:
+    """Per-pemda totals of every account code, built once per (tahun, jenis, version)."""
+    return accounts.AccountTree(_df_long, _wide)
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def breakdown_index(token: tuple, _wide: pd.DataFrame) -> breakdown.Breakdown:
+    """Component matrix indexed by daerah, built once per dataset."""
+    return breakdown.Breakdown(_wide)
+
+PIE_PAGE_SIZE = int(os.environ.get("APBD_PIE_PAGE_SIZE", "12"))
+PIE_LABELS = ["Belanja Operasi", "Belanja Modal", "Belanja Tidak Terduga", "Belanja Transfer"]
+PEER_LABELS = {"rasio_pad": "Rasio PAD", "rasio_modal": "Rasio modal", "rasio_operasi": "Rasio operasi",
+               "rasio_surplus": "Surplus/defisit per pendapatan"}
+PEER_LEVELS = {"provinsi": "Provinsi", "pulau": "Pulau", "nasional": "Nasional"}
+
+METRICS_HOST = os.environ.get("APBD_METRICS_HOST", "127.0.0.1")
+METRICS_PORT = int(os.environ.get("APBD_METRICS_PORT", "0"))
+
+# st.download_button keeps the whole file in memory for the session, so the
+# in-app button is for small exports only; anything larger goes through the
+# API's streamed /export (linked when APBD_API_URL is set)
+EXPORT_MAX_ROWS = int(os.environ.get("APBD_EXPORT_MAX_ROWS", "50000"))
+API_URL = os.environ.get("APBD_API_URL", "").rstrip("/")
+EXPORT_TABLES = {"wide": "Per daerah (ringkasan)", "long": "Baris akun (detail)"}
+
+@st.cache_resource(show_spinner=False)
+def metrics_server(port: int):
+    """Prometheus text endpoint (GET /metrics) for this Streamlit process."""
+    return metrics.serve(METRICS_HOST, port)
+
+@st.cache_resource(show_spinner=False, max_entries=8)
+def ranker(token: tuple, _wide: pd.DataFrame) -> ranking.Ranker:
+    """Per-metric orderings, computed once per dataset."""
+    return ranking.Ranker(_wide)
 
 def kpi_cards(items: list[tuple[str, str, str]]):
     """Pretty KPI cards (HTML/CSS). Use textwrap.dedent so Markdown doesn't treat it as a code block."""
@@ -301,19 +294,52 @@ def insight_box(title: str, bullets: list[str], emoji: str = "💡"):
 """
     st.markdown(html.strip(), unsafe_allow_html=True)
 
+
+def end_rerun(title: str) -> None:
+    """Rerun latency + phase report; runs at the end of the script and
+    before every early ``st.stop()``."""
+    metrics.observe("rerun", time.perf_counter() - _t_start)
+    profiling.report(title)
+
+
+def stop(title: str):
+    end_rerun(title)
+    st.stop()
+
 # =========================================================
 # Data
 # =========================================================
-DATA_PATH = "data/APBD_2023.csv"
-
-df_long = load_long(DATA_PATH)
-wide = build_wide(df_long)
+DATA_DIR = os.environ.get("APBD_DATA_DIR", "data")
+SHARED_DIR = os.environ.get("APBD_SHARED_DIR", "")
 
 # =========================================================
 # Sidebar filters
 # =========================================================
 st.sidebar.markdown("### 🎛️ Filter")
-all_pulau = ["(Semua)"] + sorted([p for p in wide["pulau"].dropna().unique().tolist() if p.strip() != ""])
+
+# only the selected (tahun, jenis) partition is loaded and aggregated (lazily)
+ref = refresher(DATA_DIR, SHARED_DIR)
+parts = ref.partitions()
+if not parts:
+    if SHARED_DIR:
+        st.error(f"Belum ada data yang dipublikasikan di `{SHARED_DIR}` (jalankan `python -m apbd.shared`).")
+    else:
+        st.error(f"Tidak ada file CSV di `{DATA_DIR}`.")
+    stop("rerun • no data")
+tahun = st.sidebar.selectbox("Tahun", sorted({p.tahun for p in parts}, reverse=True), index=0)
+jenis = st.sidebar.selectbox("Jenis", [p.jenis for p in parts if p.tahun == tahun], index=0)
+part = next(p for p in parts if p.key == (tahun, jenis))
+
+# snapshots are rebuilt by the refresher thread and swapped in atomically;
+# this rerun keeps using the one it got
+with metrics.stage("snapshot"):
+    snap = ref.snapshot(part)
+# one read-only long/wide pair per process, shared by every session; sessions
+# only hold row positions into it
+df_long, wide = snap.long, snap.wide
+token = (tahun, jenis, snap.version)
+
+all_pulau = [filters.ALL] + sorted([p for p in wide["pulau"].dropna().unique().tolist() if p.strip() != ""])
 pulau = st.sidebar.selectbox("Pulau", all_pulau, index=0)
 
 prov_choices = sorted(wide["provinsi"].dropna().unique().tolist())
@@ -337,36 +363,111 @@ with st.sidebar.expander("Tentang dashboard"):
         "komposisi belanja, dan rasio-rasio sederhana untuk analisis fiskal."
     )
 
-# apply filters
-f = wide.copy()
-if pulau != "(Semua)":
-    f = f[f["pulau"] == pulau]
-if provinsi:
-    f = f[f["provinsi"].isin(provinsi)]
-if q.strip():
-    qq = q.strip().lower()
-    f = f[
-        f["daerah"].str.lower().str.contains(qq, na=False)
-        | f["provinsi"].str.lower().str.contains(qq, na=False)
-        | f["pulau"].str.lower().str.contains(qq, na=False)
-    ]
+# apply filters (memoized row positions shared across sessions; no per-rerun copy)
+with metrics.stage("filter") as stage:
+    fcache = filter_cache(token, wide)
+    rows = fcache.rows(pulau, provinsi, q)
+    stage.rows = len(rows)
+metrics.register_cache("filter", fcache.stats)
+metrics.register_cache("figure", figure_cache().stats)
+if METRICS_PORT:
+    metrics_server(METRICS_PORT)
+# everything a chart depends on besides its own widgets
+fkey = filters.filter_key(pulau, provinsi, q)
+view_key = (*token, fkey)
+rk = ranker(token, wide)
+
+with st.sidebar.expander("⚙️ Status data & cache"):
+    rs = ref.status()
+    st.caption(
+        f"Dataset {tahun} {jenis} • versi **v{snap.version}** • dibangun "
+        f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(snap.built_at))}"
+    )
+    st.caption(
+        f"Refresher {'aktif' if rs['running'] else 'mati'} (tiap {rs['interval']:g} dtk) • "
+        f"scan terakhir {max(0.0, time.time() - rs['last_scan']):.0f} dtk lalu"
+    )
+    if rs["last_error"]:
+        st.warning(f"Refresh gagal, data terakhir tetap dipakai: {rs['last_error']}")
+    cs = fcache.stats()
+    st.caption(
+        f"Filter cache (semua sesi): {cs['hits']:,} hit • {cs['misses']:,} miss "
+        f"({cs['hit_rate']:.0%}) • {cs['entries']}/{cs['maxsize']} entri"
+    )
+    gs = figure_cache().stats()
+    st.caption(
+        f"Figure cache: {gs['hits']:,} hit • {gs['misses']:,} miss ({gs['hit_rate']:.0%}) • "
+        f"{gs['entries']} grafik, {gs['mb']:.1f}/{gs['max_mb']:.0f} MB • {gs['evictions']:,} eviksi"
+    )
+
+with st.sidebar.expander("⬇️ Ekspor data"):
+    ex_table = st.radio("Tabel", list(EXPORT_TABLES), format_func=EXPORT_TABLES.get, key="export_table")
+    ex_fmt = st.selectbox("Format", export.available_formats(), format_func=str.upper, key="export_format")
+    ex_display = st.checkbox("Format tampilan (Rp T/M/Jt, %)", key="export_display")
+    st.caption(f"{len(rows):,} daerah sesuai filter aktif • "
+               + ("nilai diformat sebagai teks" if ex_display else "nilai mentah (Rupiah penuh)"))
+    if API_URL:
+        query = urlencode({"tahun": tahun, "jenis": jenis, "pulau": pulau, "provinsi": provinsi, "q": q,
+                           "table": ex_table, "format": ex_fmt, "display": int(ex_display)}, doseq=True)
+        st.markdown(f"[Unduh langsung via API]({API_URL}/export?{query}) (dialirkan tanpa batas baris)")
+    st.caption(f"Unduhan di dashboard disimpan di memori server per sesi, maksimal {EXPORT_MAX_ROWS:,} baris"
+               + ("; data lebih besar lewat tautan API di atas." if API_URL else "."))
+    # generated only on request, chunk by chunk, from the shared snapshot (no filtered copy)
+    if st.button("Siapkan file", key="export_prepare"):
+        with metrics.stage(f"export {ex_fmt}") as stage:
+            if ex_table == "wide":
+                frame, pos = wide, rows
+            else:
+                frame, pos = df_long, export.long_positions(df_long, wide, rows)
+            stage.rows = len(pos)
+            if len(pos) > EXPORT_MAX_ROWS or (ex_fmt == "xlsx" and len(pos) > export.XLSX_MAX_ROWS):
+                st.warning(f"{len(pos):,} baris melebihi batas ekspor di dashboard; persempit filter "
+                           + ("atau gunakan tautan API di atas (dialirkan tanpa menyimpan file di memori)."
+                              if API_URL else "atau gunakan ekspor via API (`GET /export`)."))
+            else:
+                # written to disk chunk by chunk; download_button then loads the
+                # finished file into memory for this session (hence the row cap)
+                with tempfile.TemporaryFile(buffering=0) as tmp:
+                    for chunk in export.iter_export(ex_fmt, frame, pos, display=ex_display):
+                        tmp.write(chunk)
+                    tmp.seek(0)
+                    name = export.filename(ex_table, ex_fmt, tahun, jenis)
+                    st.download_button(f"Unduh {name}", data=tmp, file_name=name, mime=export.FORMATS[ex_fmt],
+                                       key="export_download")
+
+if os.environ.get("APBD_ADMIN", "1") != "0":
+    with st.sidebar.expander("📈 Metrik (admin)"):
+        # process-wide, all sessions; numbers are as of the end of the previous rerun
+        summary = pd.DataFrame(metrics.REGISTRY.summary())
+        if len(summary):
+            summary = summary.round(1).rename(columns={
+                "stage": "tahap", "count": "jumlah", "mean_ms": "rata-rata (ms)",
+                "p50_ms": "p50 (ms)", "p95_ms": "p95 (ms)", "p99_ms": "p99 (ms)", "rows": "baris",
+            })
+            st.dataframe(summary, use_container_width=True, hide_index=True)
+        for name, stats in metrics.REGISTRY.caches().items():
+            st.caption(f"Cache {name}: {stats['hits']:,} hit • {stats['misses']:,} miss ({stats['hit_rate']:.0%})")
+        if METRICS_PORT:
+            st.caption(f"Prometheus: `http://{METRICS_HOST}:{METRICS_PORT}/metrics`")
 
 # =========================================================
 # Header
 # =========================================================
+dataset_names = ", ".join(os.path.basename(p) for p in part.paths)
 st.markdown(
-    """
+    f"""
 <div class="hero">
   <div style="display:flex; align-items:flex-start; justify-content:space-between; gap:12px;">
     <div>
-      <h1>📊 Dashboard APBD 2023 • Analisis Fiskal Daerah</h1>
+      <h1>📊 Dashboard APBD {tahun} • Analisis Fiskal Daerah</h1>
       <p>
         Eksplorasi pendapatan, belanja, komposisi belanja, dan rasio kinerja fiskal.
         <span class="pill">Kelompok 31</span>
       </p>
     </div>
     <div style="text-align:right; opacity:.85; font-size:.85rem;">
-      <div><b>Dataset:</b> APBD_2023.csv</div>
+      <div><b>Dataset:</b> {dataset_names}</div>
+      <div><b>Jenis:</b> {jenis}</div>
       <div><b>Mode:</b> Interaktif (filter sidebar)</div>
     </div>
   </div>
@@ -378,17 +479,23 @@ st.markdown(
 # =========================================================
 # KPIs
 # =========================================================
-if len(f) == 0:
+if len(rows) == 0:
     st.warning("Tidak ada data yang cocok dengan filter. Coba reset filter di sidebar.")
-    st.stop()
+    stop(f"rerun {tahun} {jenis} • no rows")
 
-sd = f["surplus_defisit"].sum()
+# pulau/provinsi-only states come from the roll-up cube; a text query needs a row scan
+with metrics.stage("kpi"):
+    if fkey[2]:
+        kpi = {c: float(wide[c].to_numpy()[rows].sum()) for c in ("total_pendapatan", "total_belanja", "surplus_defisit")}
+    else:
+        kpi = snap.cube.totals(pulau, provinsi)
+sd = kpi["surplus_defisit"]
 label_sd = "Surplus (net)" if sd >= 0 else "Defisit (net)"
 
 kpi_cards([
-    ("Jumlah daerah (terfilter)", f"{len(f):,}", "unit pemda"),
-    ("Total pendapatan", fmt_idr(f["total_pendapatan"].sum()), "akumulasi"),
-    ("Total belanja", fmt_idr(f["total_belanja"].sum()), "akumulasi"),
+    ("Jumlah daerah (terfilter)", f"{len(rows):,}", "unit pemda"),
+    ("Total pendapatan", fmt_idr(kpi["total_pendapatan"]), "akumulasi"),
+    ("Total belanja", fmt_idr(kpi["total_belanja"]), "akumulasi"),
     (label_sd, fmt_idr(sd), "pendapatan - belanja"),
 ])
 
@@ -397,74 +504,75 @@ st.divider()
 # =========================================================
 # Tabs
 # =========================================================
-tab1, tab2, tab3, tab4 = st.tabs(["🏁 Ringkasan", "🏗️ Komposisi Belanja", "🧭 Rasio & Kinerja", "🥧 Breakdown Daerah"])
+# a radio instead of st.tabs: st.tabs runs the code of all four tabs on every
+# rerun, this only runs the selected one
+TABS = ["🏁 Ringkasan", "🏗️ Komposisi Belanja", "🧭 Rasio & Kinerja", "🥧 Breakdown Daerah"]
+tab = st.radio("Tab", TABS, horizontal=True, label_visibility="collapsed", key="tab")
 
 # ---------------------------------------------------------
 # TAB 1: Overview
 # ---------------------------------------------------------
-with tab1:
+if tab == TABS[0]:
     left, right = st.columns([1.1, 1])
 
     with left:
         st.markdown('<div class="card">', unsafe_allow_html=True)
         st.subheader("Top Daerah (Ranking)")
         metric = st.selectbox("Urutkan berdasarkan", ["Total Pendapatan", "Total Belanja", "Surplus/Defisit"], index=0)
+        t_rank = time.perf_counter()
         if metric == "Total Pendapatan":
-            rank_df = f.sort_values("total_pendapatan", ascending=False).head(20)
+            rank_df = rk.top_frame("total_pendapatan", 20, rows)
             show_cols = ["daerah", "provinsi", "pulau", "total_pendapatan", "pad", "rasio_pad"]
             rank_df["rasio_pad"] = rank_df["rasio_pad"].astype(float)
         elif metric == "Total Belanja":
-            rank_df = f.sort_values("total_belanja", ascending=False).head(20)
+            rank_df = rk.top_frame("total_belanja", 20, rows)
             show_cols = ["daerah", "provinsi", "pulau", "total_belanja", "belanja_operasi", "belanja_modal", "rasio_modal"]
             rank_df["rasio_modal"] = rank_df["rasio_modal"].astype(float)
         else:
-            rank_df = f.sort_values("surplus_defisit", ascending=False).head(20)
+            rank_df = rk.top_frame("surplus_defisit", 20, rows)
             show_cols = ["daerah", "provinsi", "pulau", "surplus_defisit", "total_pendapatan", "total_belanja", "rasio_pad"]
 
-        view = rank_df[show_cols].copy()
+        view = rank_df[show_cols]
         money_cols = [c for c in view.columns if c.startswith("total_") or c.startswith("belanja_") or c in ("pad", "surplus_defisit")]
-        for c in money_cols:
-            view[c] = view[c].map(fmt_idr)
         pct_cols = [c for c in view.columns if c.startswith("rasio_")]
-        for c in pct_cols:
-            view[c] = view[c].map(fmt_pct)
-
-        st.dataframe(view, use_container_width=True, hide_index=True)
+        number_table(view, money_cols, pct_cols)
+        metrics.observe("ranking table", time.perf_counter() - t_rank, len(view))
         st.caption("Tip: gunakan filter di sidebar untuk mempersempit data.")
         st.markdown('</div>', unsafe_allow_html=True)
 
     with right:
         st.markdown('<div class="card">', unsafe_allow_html=True)
         st.subheader("Pendapatan vs Belanja (Top 15)")
-        topn = (
-            f.sort_values("total_pendapatan", ascending=False)
-            .head(15)
-            .copy()
-        )
-        melt = topn.melt(
-            id_vars=["daerah", "provinsi", "pulau"],
-            value_vars=["total_pendapatan", "total_belanja"],
-            var_name="kategori",
-            value_name="nilai",
-        )
-        melt["kategori"] = melt["kategori"].map({"total_pendapatan": "Pendapatan", "total_belanja": "Belanja"})
-        fig = px.bar(
-            melt,
-            x="daerah",
-            y="nilai",
-            color="kategori",
-            barmode="group",
-            hover_data=["provinsi", "pulau"],
-            height=420,
-        )
-        fig.update_layout(margin=dict(l=10, r=10, t=10, b=10), xaxis_title=None, yaxis_title="Nilai (Rp)")
-        fig.update_xaxes(tickangle=-35)
-        st.plotly_chart(fig, use_container_width=True)
+        def top15_fig():
+            import plotly.express as px
+
+            topn = rk.top_frame("total_pendapatan", 15, rows)
+            melt = topn.melt(
+                id_vars=["daerah", "provinsi", "pulau"],
+                value_vars=["total_pendapatan", "total_belanja"],
+                var_name="kategori",
+                value_name="nilai",
+            )
+            melt["kategori"] = melt["kategori"].map({"total_pendapatan": "Pendapatan", "total_belanja": "Belanja"})
+            fig = px.bar(
+                melt,
+                x="daerah",
+                y="nilai",
+                color="kategori",
+                barmode="group",
+                hover_data=["provinsi", "pulau"],
+                height=420,
+            )
+            fig.update_layout(margin=dict(l=10, r=10, t=10, b=10), xaxis_title=None, yaxis_title="Nilai (Rp)")
+            fig.update_xaxes(tickangle=-35)
+            return fig
+
+        show_chart(("top15", *view_key), top15_fig)
         st.markdown('</div>', unsafe_allow_html=True)
 
     # Quick insights
-    top_invest = f.sort_values("rasio_modal", ascending=False).head(1).iloc[0]
-    top_ops = f.sort_values("rasio_operasi", ascending=False).head(1).iloc[0]
+    top_invest = rk.top_frame("rasio_modal", 1, rows).iloc[0]
+    top_ops = rk.top_frame("rasio_operasi", 1, rows).iloc[0]
     insight_box(
         "Insight cepat",
         [
@@ -478,133 +586,186 @@ with tab1:
 # ---------------------------------------------------------
 # TAB 2: Belanja composition stacked bar + insights
 # ---------------------------------------------------------
-with tab2:
+if tab == TABS[1]:
     st.markdown('<div class="card">', unsafe_allow_html=True)
     st.subheader("Komposisi Belanja per Daerah (Stacked Bar)")
     st.caption("Sumbu X: daerah • Sumbu Y: total belanja • Warna: komponen belanja")
 
     n = st.slider("Jumlah daerah yang ditampilkan", min_value=5, max_value=35, value=15, step=5)
     basis = st.selectbox("Pilih basis urutan", ["Total Belanja", "Rasio Belanja Modal", "Rasio Belanja Operasi"], index=0)
-    if basis == "Total Belanja":
-        bdf = f.sort_values("total_belanja", ascending=False).head(n).copy()
-    elif basis == "Rasio Belanja Modal":
-        bdf = f.sort_values("rasio_modal", ascending=False).head(n).copy()
-    else:
-        bdf = f.sort_values("rasio_operasi", ascending=False).head(n).copy()
 
-    comp = bdf[[
-        "daerah", "provinsi", "pulau",
-        "belanja_operasi", "belanja_modal", "belanja_tidak_terduga", "belanja_transfer"
-    ]].copy()
+    def komposisi_fig():
+        import plotly.express as px
 
-    comp_long = comp.melt(
-        id_vars=["daerah", "provinsi", "pulau"],
-        var_name="komponen",
-        value_name="nilai",
-    )
-    label_map = {
-        "belanja_operasi": "Belanja Operasi",
-        "belanja_modal": "Belanja Modal",
-        "belanja_tidak_terduga": "Belanja Tidak Terduga",
-        "belanja_transfer": "Belanja Transfer",
-    }
-    comp_long["komponen"] = comp_long["komponen"].map(label_map).fillna(comp_long["komponen"])
-
-    fig2 = px.bar(
-        comp_long,
-        x="daerah",
-        y="nilai",
-        color="komponen",
-        barmode="stack",
-        hover_data=["provinsi", "pulau"],
-        height=460,
-    )
-    fig2.update_layout(margin=dict(l=10, r=10, t=10, b=10), xaxis_title=None, yaxis_title="Total Belanja (Rp)")
-    fig2.update_xaxes(tickangle=-35)
-    st.plotly_chart(fig2, use_container_width=True)
+        if basis == "Total Belanja":
+            bdf = rk.top_frame("total_belanja", n, rows)
+        elif basis == "Rasio Belanja Modal":
+            bdf = rk.top_frame("rasio_modal", n, rows)
+        else:
+            bdf = rk.top_frame("rasio_operasi", n, rows)
+
+        comp = bdf[[
+            "daerah", "provinsi", "pulau",
+            "belanja_operasi", "belanja_modal", "belanja_tidak_terduga", "belanja_transfer"
+        ]].copy()
+
+        comp_long = comp.melt(
+            id_vars=["daerah", "provinsi", "pulau"],
+            var_name="komponen",
+            value_name="nilai",
+        )
+        label_map = {
+            "belanja_operasi": "Belanja Operasi",
+            "belanja_modal": "Belanja Modal",
+            "belanja_tidak_terduga": "Belanja Tidak Terduga",
+            "belanja_transfer": "Belanja Transfer",
+        }
+        comp_long["komponen"] = comp_long["komponen"].map(label_map).fillna(comp_long["komponen"])
+
+        fig2 = px.bar(
+            comp_long,
+            x="daerah",
+            y="nilai",
+            color="komponen",
+            barmode="stack",
+            hover_data=["provinsi", "pulau"],
+            height=460,
+        )
+        fig2.update_layout(margin=dict(l=10, r=10, t=10, b=10), xaxis_title=None, yaxis_title="Total Belanja (Rp)")
+        fig2.update_xaxes(tickangle=-35)
+        return fig2
+
+    show_chart(("komposisi", *view_key, n, basis), komposisi_fig)
 
     # insights for modal vs operasi
-    modal_big = f.dropna(subset=["rasio_modal"]).sort_values("rasio_modal", ascending=False).head(5)
-    ops_big = f.dropna(subset=["rasio_operasi"]).sort_values("rasio_operasi", ascending=False).head(5)
+    modal_big = rk.top_frame("rasio_modal", 5, rows, dropna=True)
+    ops_big = rk.top_frame("rasio_operasi", 5, rows, dropna=True)
 
     st.markdown("#### 🔍 Insight")
     colA, colB = st.columns(2)
     with colA:
         insight_box(
             "Proporsi belanja modal besar (indikasi investasi jangka panjang)",
-            [f"**{r.daerah}** ({r.provinsi}) — {fmt_pct(r.rasio_modal)}" for r in modal_big.itertuples()],
+            [f"**{d}** ({p}) — {v}" for d, p, v in zip(modal_big["daerah"], modal_big["provinsi"],
+                                                      formatting.pct(modal_big["rasio_modal"]))],
             emoji="🏗️",
         )
     with colB:
         insight_box(
             "Belanja operasi “gendut” (indikasi dominasi biaya rutin)",
-            [f"**{r.daerah}** ({r.provinsi}) — {fmt_pct(r.rasio_operasi)}" for r in ops_big.itertuples()],
+            [f"**{d}** ({p}) — {v}" for d, p, v in zip(ops_big["daerah"], ops_big["provinsi"],
+                                                      formatting.pct(ops_big["rasio_operasi"]))],
             emoji="🧾",
         )
 
+    st.markdown("#### 🧾 Drill-down Akun (Level 3)")
+    tree = account_tree(token, df_long, wide)
+    parents = tree.parents()
+    parent = st.selectbox(
+        "Akun induk",
+        parents,
+        index=parents.index("41") if "41" in parents else 0,
+        format_func=tree.label,
+    )
+    kids = tree.children(parent)
+
+    def akun_fig():
+        import plotly.express as px
+
+        # top daerah by the parent account, split into its child accounts
+        vals = tree.values([parent] + kids, rows)
+        top = np.argsort(-vals[:, 0], kind="stable")[:n]
+        akun_df = pd.DataFrame(vals[top, 1:], columns=[tree.label(c) for c in kids])
+        akun_df.insert(0, "daerah", filters.take(wide["daerah"], rows[top]).astype(str))
+        akun_long = akun_df.melt(id_vars="daerah", var_name="akun", value_name="nilai")
+        fig5 = px.bar(akun_long, x="daerah", y="nilai", color="akun", barmode="stack", height=460)
+        fig5.update_layout(margin=dict(l=10, r=10, t=10, b=10), xaxis_title=None, yaxis_title=f"{tree.label(parent)} (Rp)")
+        fig5.update_xaxes(tickangle=-35)
+        return fig5
+
+    show_chart(("akun", *view_key, parent, n), akun_fig)
+    number_table(tree.breakdown(parent, rows)[["akun", "nilai", "porsi"]], ["nilai"], ["porsi"])
+
     st.markdown('</div>', unsafe_allow_html=True)
 
 # ---------------------------------------------------------
 # TAB 3: Ratios + scatter map
 # ---------------------------------------------------------
-with tab3:
+if tab == TABS[2]:
     st.markdown('<div class="card">', unsafe_allow_html=True)
     st.subheader("Perbandingan Rasio (Analitis Ringan)")
     st.caption("Rasio PAD/Total Pendapatan vs Rasio Belanja Modal/Total Belanja (peta kinerja fiskal sederhana)")
 
     # Example selection
-    default_examples = (
-        f.sort_values("total_pendapatan", ascending=False)["daerah"].head(8).tolist()
-    )
-    pick_daerah = st.multiselect("Pilih beberapa daerah", sorted(f["daerah"].unique().tolist()), default=default_examples)
-
-    ex = f[f["daerah"].isin(pick_daerah)].copy()
-    ex = ex.replace([np.inf, -np.inf], np.nan)
+    default_examples = rk.top_frame("total_pendapatan", 8, rows)["daerah"].tolist()
+    pick_daerah = st.multiselect("Pilih beberapa daerah", fcache.options(rows), default=default_examples)
 
     c1, c2 = st.columns([1, 1.3])
 
     with c1:
-        # bar for ratios
-        bar_df = ex[["daerah", "rasio_pad", "rasio_modal"]].copy()
-        bar_long = bar_df.melt(id_vars=["daerah"], var_name="rasio", value_name="nilai")
-        bar_long["rasio"] = bar_long["rasio"].map({"rasio_pad": "Rasio PAD / Pendapatan", "rasio_modal": "Rasio Modal / Belanja"})
-        fig3 = px.bar(
-            bar_long,
-            x="daerah",
-            y="nilai",
-            color="rasio",
-            barmode="group",
-            height=430,
-        )
-        fig3.update_layout(margin=dict(l=10, r=10, t=10, b=10), xaxis_title=None, yaxis_title="Rasio")
-        fig3.update_yaxes(tickformat=".0%")
-        fig3.update_xaxes(tickangle=-35)
-        st.plotly_chart(fig3, use_container_width=True)
+        def rasio_fig():
+            import plotly.express as px
+
+            picked = np.isin(filters.take(wide["daerah"], rows).astype(str), pick_daerah)
+            ex = wide.iloc[rows[picked]].replace([np.inf, -np.inf], np.nan)
+
+            # bar for ratios
+            bar_df = ex[["daerah", "rasio_pad", "rasio_modal"]].copy()
+            bar_long = bar_df.melt(id_vars=["daerah"], var_name="rasio", value_name="nilai")
+            bar_long["rasio"] = bar_long["rasio"].map({"rasio_pad": "Rasio PAD / Pendapatan", "rasio_modal": "Rasio Modal / Belanja"})
+            fig3 = px.bar(
+                bar_long,
+                x="daerah",
+                y="nilai",
+                color="rasio",
+                barmode="group",
+                height=430,
+            )
+            fig3.update_layout(margin=dict(l=10, r=10, t=10, b=10), xaxis_title=None, yaxis_title="Rasio")
+            fig3.update_yaxes(tickformat=".0%")
+            fig3.update_xaxes(tickangle=-35)
+            return fig3
+
+        show_chart(("rasio", *view_key, tuple(pick_daerah)), rasio_fig)
 
     with c2:
-        # scatter map of performance
-        scatter_df = f.copy()
-        scatter_df = scatter_df.replace([np.inf, -np.inf], np.nan).dropna(subset=["rasio_pad", "rasio_modal"])
-        xmed = float(scatter_df["rasio_pad"].median()) if len(scatter_df) else 0.0
-        ymed = float(scatter_df["rasio_modal"].median()) if len(scatter_df) else 0.0
-
-        fig4 = px.scatter(
-            scatter_df,
-            x="rasio_pad",
-            y="rasio_modal",
-            size="total_pendapatan",
-            hover_name="daerah",
-            hover_data={"provinsi": True, "pulau": True, "total_pendapatan": ":,.0f", "total_belanja": ":,.0f"},
-            color="pulau",
-            height=430,
-        )
-        # median lines (quadrants)
-        fig4.add_vline(x=xmed, line_dash="dot")
-        fig4.add_hline(y=ymed, line_dash="dot")
-        fig4.update_layout(margin=dict(l=10, r=10, t=10, b=10), xaxis_title="Rasio PAD / Total Pendapatan", yaxis_title="Rasio Belanja Modal / Total Belanja")
-        fig4.update_xaxes(tickformat=".0%")
-        fig4.update_yaxes(tickformat=".0%")
-        st.plotly_chart(fig4, use_container_width=True)
+        def scatter_fig():
+            import plotly.express as px
+
+            # scatter map of performance
+            scatter_df = wide.iloc[rows].replace([np.inf, -np.inf], np.nan).dropna(subset=["rasio_pad", "rasio_modal"])
+            # medians on the full data; above the budget only a sample is drawn (WebGL)
+            xmed, ymed = scatter.medians(scatter_df, "rasio_pad", "rasio_modal")
+            large = len(scatter_df) > SCATTER_MAX_POINTS
+            if large:
+                scatter_df = scatter.downsample(scatter_df, "rasio_pad", "rasio_modal", SCATTER_MAX_POINTS, size="total_pendapatan")
+
+            fig4 = px.scatter(
+                scatter_df,
+                x="rasio_pad",
+                y="rasio_modal",
+                size="total_pendapatan",
+                hover_name="daerah",
+                hover_data={"provinsi": True, "pulau": True, "total_pendapatan": ":,.0f", "total_belanja": ":,.0f"},
+                color="pulau",
+                height=430,
+                render_mode="webgl" if large else "auto",
+            )
+            # median lines (quadrants)
+            fig4.add_vline(x=xmed, line_dash="dot")
+            fig4.add_hline(y=ymed, line_dash="dot")
+            fig4.update_layout(margin=dict(l=10, r=10, t=10, b=10), xaxis_title="Rasio PAD / Total Pendapatan", yaxis_title="Rasio Belanja Modal / Total Belanja")
+            fig4.update_xaxes(tickformat=".0%")
+            fig4.update_yaxes(tickformat=".0%")
+            return fig4
+
+        show_chart(("scatter", *view_key), scatter_fig)
+        n_points = int((np.isfinite(wide["rasio_pad"].to_numpy()[rows]) & np.isfinite(wide["rasio_modal"].to_numpy()[rows])).sum())
+        if n_points > SCATTER_MAX_POINTS:
+            st.caption(
+                f"Mode data besar: menampilkan {SCATTER_MAX_POINTS:,} dari {n_points:,} daerah "
+                "(sampel dengan outlier tetap dipertahankan); garis median dihitung dari semua data."
+            )
 
         insight_box(
             "Cara baca scatter",
@@ -622,56 +783,92 @@ with tab3:
 # ---------------------------------------------------------
 # TAB 4: Breakdown pies
 # ---------------------------------------------------------
-with tab4:
+if tab == TABS[3]:
     st.markdown('<div class="card">', unsafe_allow_html=True)
     st.subheader("Breakdown (Pie) per Daerah")
     st.caption("Pilih daerah → lihat komposisi belanja (Operasi/Modal/Tidak Terduga/Transfer)")
 
     # default picks from ranking
-    rank_df = f.sort_values("total_belanja", ascending=False).head(10)
-    default_picks = rank_df["daerah"].head(3).tolist()
+    default_picks = rk.top_frame("total_belanja", 3, rows)["daerah"].tolist()
 
     picks = st.multiselect(
         "Pilih daerah untuk pie chart",
-        options=sorted(f["daerah"].unique().tolist()),
+        options=fcache.options(rows),
         default=default_picks,
     )
 
     if not picks:
         st.info("Pilih minimal 1 daerah untuk menampilkan pie chart.")
-        st.stop()
-
-    show = f[f["daerah"].isin(picks)].copy()
-
-    # show pies in grid
-    cols = st.columns(min(3, len(picks)))
-    for i, d in enumerate(picks):
-        row = show[show["daerah"] == d].iloc[0]
-        pie_df = pd.DataFrame({
-            "komponen": ["Belanja Operasi", "Belanja Modal", "Belanja Tidak Terduga", "Belanja Transfer"],
-            "nilai": [row["belanja_operasi"], row["belanja_modal"], row["belanja_tidak_terduga"], row["belanja_transfer"]],
-        })
-        figp = px.pie(pie_df, names="komponen", values="nilai", hole=.45)
-        figp.update_layout(margin=dict(l=10, r=10, t=10, b=10), height=360, title=f"{d}")
-        with cols[i % len(cols)]:
-            st.plotly_chart(figp, use_container_width=True)
-            st.caption(f"Total belanja: **{fmt_idr(row['total_belanja'])}** • Rasio modal: **{fmt_pct(row['rasio_modal'])}**")
+        stop(f"rerun {tahun} {jenis} • {tab}")
+
+    bd = breakdown_index(token, wide)
+    n_pages = breakdown.pages(picks, PIE_PAGE_SIZE)
+    page = 1
+    if n_pages > 1:
+        page = st.number_input(f"Halaman pie (total {len(picks)} daerah)", min_value=1, max_value=n_pages, value=1, step=1)
+    page_picks = picks[(page - 1) * PIE_PAGE_SIZE:page * PIE_PAGE_SIZE]
+
+    def pies_fig():
+        import plotly.graph_objects as go
+        from plotly.subplots import make_subplots
+
+        # all pies of the page in one figure; components gathered in one go
+        pos = bd.positions(page_picks)
+        values = bd.values[pos]
+        names = bd.wide["daerah"].astype(str).to_numpy()[pos]
+        total = bd.column("total_belanja", pos)
+        modal = bd.column("rasio_modal", pos)
+        ncols = min(3, len(pos))
+        nrows = -(-len(pos) // ncols)
+        titles = [f"{d}<br><sup>Total belanja: {t} • Rasio modal: {m}</sup>"
+                  for d, t, m in zip(names, formatting.idr(total), formatting.pct(modal))]
+        figp = make_subplots(rows=nrows, cols=ncols, specs=[[{"type": "domain"}] * ncols] * nrows, subplot_titles=titles, vertical_spacing=0.12 / nrows)
+        for i, (d, v) in enumerate(zip(names, values)):
+            figp.add_trace(go.Pie(labels=PIE_LABELS, values=v, hole=.45, name=d, sort=False), row=i // ncols + 1, col=i % ncols + 1)
+        figp.update_layout(margin=dict(l=10, r=10, t=50, b=10), height=380 * nrows)
+        return figp
+
+    show_chart(("pies", *view_key, tuple(page_picks)), pies_fig)
 
     st.markdown("#### ✨ Mini Insight")
     # best/worst among picks
-    show2 = show.dropna(subset=["rasio_modal", "rasio_operasi"])
-    if len(show2) >= 1:
-        best_modal = show2.sort_values("rasio_modal", ascending=False).iloc[0]
-        best_ops = show2.sort_values("rasio_operasi", ascending=False).iloc[0]
+    pos = bd.positions(picks)
+    rm, ro = bd.column("rasio_modal", pos), bd.column("rasio_operasi", pos)
+    valid = ~(np.isnan(rm) | np.isnan(ro))
+    if valid.any():
+        names = bd.wide["daerah"].astype(str).to_numpy()[pos[valid]]
+        i_modal, i_ops = int(np.argmax(rm[valid])), int(np.argmax(ro[valid]))
         insight_box(
             "Dari pilihan kamu",
             [
-                f"Modal tertinggi: **{best_modal['daerah']}** — {fmt_pct(best_modal['rasio_modal'])}",
-                f"Operasi tertinggi: **{best_ops['daerah']}** — {fmt_pct(best_ops['rasio_operasi'])}",
+                f"Modal tertinggi: **{names[i_modal]}** — {fmt_pct(rm[valid][i_modal])}",
+                f"Operasi tertinggi: **{names[i_ops]}** — {fmt_pct(ro[valid][i_ops])}",
             ],
             emoji="🥇",
         )
 
+    st.markdown("#### 🧮 Posisi terhadap kelompok")
+    level = st.radio("Kelompok pembanding", list(PEER_LEVELS), format_func=PEER_LEVELS.get,
+                     horizontal=True, key="peer_level")
+    # precomputed with the snapshot: the panel is one gather for any number of picks
+    panel = snap.peers.panel(pos)
+    peer_view = pd.DataFrame({
+        "daerah": filters.take(wide["daerah"], panel["pos"].to_numpy()),
+        "rasio": panel["metrik"].map(PEER_LABELS),
+        "nilai": panel["nilai"] * 100,
+        "persentil": panel[f"{level}_persentil"],
+        "peringkat": [f"{r:.0f} / {n:.0f}" if n == n and r == r else "-"
+                      for r, n in zip(panel[f"{level}_peringkat"], panel[f"{level}_n"])],
+        "z-score": panel[f"{level}_z"],
+    })
+    st.dataframe(peer_view, use_container_width=True, hide_index=True, column_config={
+        "nilai": st.column_config.NumberColumn("nilai", format="%.1f%%"),
+        "persentil": st.column_config.ProgressColumn("persentil", min_value=0, max_value=100, format="%.0f"),
+        "z-score": st.column_config.NumberColumn("z-score", format="%+.2f"),
+    })
+    st.caption(f"Persentil 100 = nilai tertinggi di kelompoknya; peringkat 1 = tertinggi. "
+               f"z-score = selisih dari rata-rata {PEER_LEVELS[level].lower()} dalam satuan simpangan baku.")
+
     st.markdown('</div>', unsafe_allow_html=True)
 
 # =========================================================
@@ -691,3 +888,4 @@ st.markdown(
 """,
     unsafe_allow_html=True,
 )
+end_rerun(f"rerun {tahun} {jenis} • {tab}")
@@ -0,0 +1,2 @@
+"""Benchmarks for the data layer. Run from the repo root, e.g.
+``python -m bench.build_wide``."""
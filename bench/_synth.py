@@ -0,0 +1,41 @@
+"""Synthetic scale-up of ``data/APBD_2023.csv`` for benchmarks."""
+from __future__ import annotations
+
+import pandas as pd
+
+from apbd import loader
+
+DATA_PATH = "data/APBD_2023.csv"
+
+
+def replicate(df: pd.DataFrame, factor: int, col: str = "daerah") -> pd.DataFrame:
+    """Stack ``factor`` copies of ``df`` with ``col`` suffixed per copy so every
+    copy aggregates into its own groups."""
+    if factor <= 1:
+        return df.copy()
+    compact = isinstance(df[col].dtype, pd.CategoricalDtype)
+    base = df[col].astype(str)
+    parts = []
+    for i in range(factor):
+        part = df.copy()
+        part[col] = base + f" #{i}" if i else base
+        parts.append(part)
+    out = pd.concat(parts, ignore_index=True)
+    return loader.to_compact(out) if compact else out
+
+
+def synthetic_long(factor: int, path: str = DATA_PATH, compact: bool = True) -> pd.DataFrame:
+    """Normalized long table ``factor`` times the size of the bundled CSV."""
+    return replicate(loader.load_long(path, compact=compact), factor)
+
+
+def synthetic_csv(factor: int, out: str, path: str = DATA_PATH) -> str:
+    """Write the raw CSV ``factor`` times over (pemda names suffixed) to ``out``."""
+    raw = pd.read_csv(path)
+    name = raw.columns[0]
+    base = raw[name].astype(str)
+    for i in range(factor):
+        part = raw.copy()
+        part[name] = base + f" #{i}" if i else base
+        part.to_csv(out, mode="a" if i else "w", header=not i, index=False)
+    return out
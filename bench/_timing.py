@@ -0,0 +1,14 @@
+"""Wall-clock timing helper shared by the micro-benchmarks."""
+from __future__ import annotations
+
+import time
+
+
+def timeit(fn, repeat: int) -> float:
+    """Best of ``repeat`` calls of ``fn()``, in seconds."""
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
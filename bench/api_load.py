@@ -0,0 +1,124 @@
+"""Load test for the headless API: p50/p99 latency and throughput.
+
+    python -m bench.api_load [--concurrency 16] [--duration 10] [--workers 8]
+    python -m bench.api_load --url http://127.0.0.1:8600   # existing server
+
+Without ``--url`` a server (``python -m apbd.api``) is started in a
+subprocess on a free port so clients and server don't share a GIL.
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import urllib.request
+from urllib.parse import urlencode
+
+QUERIES = [
+    ("kpi", {}),
+    ("kpi", {"pulau": "Jawa"}),
+    ("kpi", {"provinsi": "Provinsi Jawa Barat"}),
+    ("kpi", {"q": "kota"}),
+    ("ranking", {"metric": "total_pendapatan", "n": 20}),
+    ("ranking", {"metric": "total_belanja", "n": 20, "pulau": "Sumatera"}),
+    ("ranking", {"metric": "surplus_defisit", "n": 10, "q": "kab"}),
+    ("ranking", {"metric": "rasio_modal", "n": 5, "pulau": "Kalimantan"}),
+    ("ranking", {"metric": "rasio_operasi", "n": 5}),
+]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_ready(url: str, timeout: float = 60.0) -> None:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f"{url}/kpi", timeout=5).read()  # also warms the snapshot
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise RuntimeError(f"server at {url} not ready after {timeout}s")
+
+
+def percentile(values: list[float], p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+
+def run(url: str, concurrency: int, duration: float, seed: int) -> dict[str, list[float]]:
+    latencies: dict[str, list[float]] = {}
+    errors = []
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + duration
+
+    def client(i: int) -> None:
+        rnd = random.Random(seed + i)
+        local: dict[str, list[float]] = {}
+        while time.perf_counter() < stop_at:
+            endpoint, params = rnd.choice(QUERIES)
+            t0 = time.perf_counter()
+            try:
+                urllib.request.urlopen(f"{url}/{endpoint}?{urlencode(params)}", timeout=30).read()
+            except OSError as exc:
+                errors.append(exc)
+                continue
+            local.setdefault(endpoint, []).append(time.perf_counter() - t0)
+        with lock:
+            for k, v in local.items():
+                latencies.setdefault(k, []).extend(v)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    if errors:
+        print(f"errors: {len(errors)} (first: {errors[0]!r})")
+    return latencies
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--url", help="benchmark an already running server")
+    ap.add_argument("--concurrency", type=int, default=16)
+    ap.add_argument("--duration", type=float, default=10.0)
+    ap.add_argument("--workers", type=int, default=8, help="server thread pool size (spawned server only)")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    proc = None
+    url = args.url
+    if url is None:
+        port = free_port()
+        proc = subprocess.Popen([sys.executable, "-m", "apbd.api", "--port", str(port),
+                                 "--workers", str(args.workers)], stdout=subprocess.DEVNULL)
+        url = f"http://127.0.0.1:{port}"
+    try:
+        wait_ready(url)
+        latencies = run(url, args.concurrency, args.duration, args.seed)
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait()
+
+    total = sum(len(v) for v in latencies.values())
+    print(f"{url} • concurrency {args.concurrency} • {args.duration:g}s")
+    print(f"{'endpoint':<10} {'requests':>9} {'p50_ms':>8} {'p99_ms':>8} {'mean_ms':>8}")
+    for name, vals in sorted(latencies.items()) + [("all", [x for v in latencies.values() for x in v])]:
+        if vals:
+            print(f"{name:<10} {len(vals):>9,} {percentile(vals, 50) * 1e3:>8.2f} "
+                  f"{percentile(vals, 99) * 1e3:>8.2f} {statistics.fmean(vals) * 1e3:>8.2f}")
+    print(f"throughput: {total / args.duration:,.0f} req/s")
+
+
+if __name__ == "__main__":
+    main()
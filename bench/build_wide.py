@@ -0,0 +1,119 @@
+"""Compare the single-pass ``build_wide`` with the original filter/merge one.
+
+    python -m bench.build_wide [--factors 1 10 50] [--repeat 3]
+"""
+from __future__ import annotations
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from apbd import aggregate
+from bench._synth import synthetic_long
+
+
+def build_wide_legacy(df_long: pd.DataFrame) -> pd.DataFrame:
+    """The seven filter-groupby-merge passes the dashboard used originally."""
+    pendapatan = (
+        df_long[df_long["level1"].str.contains("Pendapatan", case=False, na=False)]
+        .groupby(["daerah", "provinsi", "pulau"], as_index=False)["nilai"].sum()
+        .rename(columns={"nilai": "total_pendapatan"})
+    )
+    belanja = (
+        df_long[df_long["level1"].str.contains("Belanja", case=False, na=False)]
+        .groupby(["daerah", "provinsi", "pulau"], as_index=False)["nilai"].sum()
+        .rename(columns={"nilai": "total_belanja"})
+    )
+
+    pad = (
+        df_long[
+            (df_long["level1"].str.contains("Pendapatan", case=False, na=False))
+            & (df_long["level2"].str.contains("PAD", case=False, na=False))
+        ]
+        .groupby(["daerah", "provinsi", "pulau"], as_index=False)["nilai"].sum()
+        .rename(columns={"nilai": "pad"})
+    )
+
+    def belanja_comp(keyword: str, out_col: str) -> pd.DataFrame:
+        return (
+            df_long[
+                (df_long["level1"].str.contains("Belanja", case=False, na=False))
+                & (df_long["level2"].str.contains(keyword, case=False, na=False))
+            ]
+            .groupby(["daerah", "provinsi", "pulau"], as_index=False)["nilai"].sum()
+            .rename(columns={"nilai": out_col})
+        )
+
+    b_operasi = belanja_comp("Belanja Operasi", "belanja_operasi")
+    b_modal = belanja_comp("Belanja Modal", "belanja_modal")
+    b_tidak = belanja_comp("Belanja Tidak Terduga", "belanja_tidak_terduga")
+    b_transfer = belanja_comp("Belanja Transfer", "belanja_transfer")
+
+    wide = pendapatan.merge(belanja, on=["daerah", "provinsi", "pulau"], how="outer")
+    for part in [pad, b_operasi, b_modal, b_tidak, b_transfer]:
+        wide = wide.merge(part, on=["daerah", "provinsi", "pulau"], how="left")
+
+    for c in ["total_pendapatan", "total_belanja", "pad",
+              "belanja_operasi", "belanja_modal", "belanja_tidak_terduga", "belanja_transfer"]:
+        if c not in wide.columns:
+            wide[c] = 0.0
+        wide[c] = pd.to_numeric(wide[c], errors="coerce").fillna(0.0)
+
+    wide["surplus_defisit"] = wide["total_pendapatan"] - wide["total_belanja"]
+
+    # ratios
+    wide["rasio_pad"] = np.where(wide["total_pendapatan"] > 0, wide["pad"] / wide["total_pendapatan"], np.nan)
+    wide["rasio_modal"] = np.where(wide["total_belanja"] > 0, wide["belanja_modal"] / wide["total_belanja"], np.nan)
+    wide["rasio_operasi"] = np.where(wide["total_belanja"] > 0, wide["belanja_operasi"] / wide["total_belanja"], np.nan)
+
+    return wide
+
+
+def best_of(fn, arg, repeat: int) -> tuple[float, pd.DataFrame]:
+    best = float("inf")
+    out = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn(arg)
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def check_same(new: pd.DataFrame, old: pd.DataFrame) -> None:
+    assert list(new.columns) == list(old.columns), (list(new.columns), list(old.columns))
+    keys = aggregate.KEYS
+    new = new.reset_index(drop=True)
+    old = old.reset_index(drop=True)
+    new[keys] = new[keys].astype(str)
+    old[keys] = old[keys].astype(str)
+    pd.testing.assert_frame_equal(
+        new, old,
+        check_dtype=False, check_exact=False, rtol=1e-9,
+    )
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--factors", type=int, nargs="+", default=[1, 10, 50])
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+
+    # legacy and new on the same plain-string input, plus new on the
+    # categorical table load_long returns today
+    print(f"{'factor':>6} {'rows':>10} {'pemda':>7} {'legacy_s':>9} {'new_s':>8} {'speedup':>8} {'new_cat_s':>10}")
+    for factor in args.factors:
+        plain = synthetic_long(factor, compact=False)
+        compact = synthetic_long(factor)
+        t_old, old = best_of(build_wide_legacy, plain, args.repeat)
+        t_new, new = best_of(aggregate.build_wide, plain, args.repeat)
+        t_cat, new_cat = best_of(aggregate.build_wide, compact, args.repeat)
+        check_same(new, old)
+        check_same(new_cat, old)
+        print(f"{factor:>6} {len(plain):>10,} {len(new):>7,} {t_old:>9.3f} {t_new:>8.3f} "
+              f"{t_old / t_new:>7.1f}x {t_cat:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
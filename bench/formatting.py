@@ -0,0 +1,46 @@
+"""Per-cell ``Series.map(fmt_idr/fmt_pct)`` vs the vectorized formatters,
+on every money/ratio column of the wide table.
+
+    python -m bench.formatting [--factors 1 20 100] [--repeat 5]
+"""
+from __future__ import annotations
+
+import argparse
+
+import numpy as np
+
+from apbd import aggregate, formatting
+from bench._synth import synthetic_long
+from bench._timing import timeit
+
+RATIO_COLS = ["rasio_pad", "rasio_modal", "rasio_operasi"]
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--factors", type=int, nargs="+", default=[1, 20, 100])
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    money = aggregate.CUBE_COLS
+    print(f"{'pemda':>8} {'cells':>9} {'map':>10} {'vectorized':>11} {'speedup':>8}")
+    for factor in args.factors:
+        wide = aggregate.build_wide(synthetic_long(factor))
+
+        def per_cell():
+            return ([wide[c].map(formatting.fmt_idr) for c in money]
+                    + [wide[c].map(formatting.fmt_pct) for c in RATIO_COLS])
+
+        def vectorized():
+            return ([formatting.idr(wide[c].to_numpy()) for c in money]
+                    + [formatting.pct(wide[c].to_numpy()) for c in RATIO_COLS])
+
+        for a, b in zip(per_cell(), vectorized()):
+            assert np.array_equal(a.to_numpy(dtype=str), b), "formatting differs"
+        t_map, t_vec = timeit(per_cell, args.repeat), timeit(vectorized, args.repeat)
+        cells = len(wide) * (len(money) + len(RATIO_COLS))
+        print(f"{len(wide):>8,} {cells:>9,} {t_map * 1000:>8.1f}ms {t_vec * 1000:>9.1f}ms {t_map / t_vec:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""Memory per row of the long / wide tables, plain strings vs compact dtypes.
+
+    python -m bench.memory [--factor 1]
+
+``st.cache_data`` pickles its return values and hands every caller an
+unpickled copy, so the pickled size is reported too.
+"""
+from __future__ import annotations
+
+import argparse
+import pickle
+
+import pandas as pd
+
+from apbd import aggregate, loader
+from bench._synth import DATA_PATH, replicate
+
+
+def sizes(df: pd.DataFrame) -> tuple[int, int]:
+    return int(df.memory_usage(deep=True).sum()), len(pickle.dumps(df, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--factor", type=int, default=1)
+    args = ap.parse_args()
+
+    plain_long = replicate(loader.load_long(DATA_PATH, compact=False), args.factor)
+    compact_long = loader.to_compact(plain_long.copy())
+    plain_wide = aggregate.build_wide(plain_long)
+    plain_wide[aggregate.KEYS] = plain_wide[aggregate.KEYS].astype(str)
+    compact_wide = aggregate.build_wide(compact_long)
+
+    print(f"{'table':<6} {'dtypes':<8} {'rows':>9} {'B/row':>8} {'pickle B/row':>13} {'total MB':>9}")
+    for name, plain, compact in [("long", plain_long, compact_long), ("wide", plain_wide, compact_wide)]:
+        for label, df in [("plain", plain), ("compact", compact)]:
+            mem, pick = sizes(df)
+            print(f"{name:<6} {label:<8} {len(df):>9,} {mem / len(df):>8.1f} {pick / len(df):>13.1f} {mem / 1e6:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
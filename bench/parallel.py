@@ -0,0 +1,47 @@
+"""Scaling of multi-file ingestion over 1/2/4/8 worker processes.
+
+    python -m bench.parallel [--files 8] [--factor 10] [--workers 1 2 4 8]
+
+Writes ``files`` synthetic CSVs (each ``factor`` times ``APBD_2023.csv``),
+then times ``apbd.parallel.build_wide`` (including pool start-up) per worker
+count and checks every result against the single-process one.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+from apbd import parallel
+from bench._synth import synthetic_csv
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--files", type=int, default=8)
+    ap.add_argument("--factor", type=int, default=10)
+    ap.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = [synthetic_csv(args.factor, os.path.join(tmp, f"part_{i}.csv")) for i in range(args.files)]
+        size = sum(os.path.getsize(p) for p in paths) / 2**20
+        print(f"{args.files} files, {size:,.0f} MB total, {os.cpu_count()} CPU(s)")
+        baseline = None
+        print(f"{'workers':>8} {'seconds':>8} {'speedup':>8}")
+        for w in args.workers:
+            t0 = time.perf_counter()
+            wide = parallel.build_wide(paths, workers=w)
+            seconds = time.perf_counter() - t0
+            if baseline is None:
+                baseline = (wide, seconds)
+            else:
+                pd.testing.assert_frame_equal(baseline[0], wide)
+            print(f"{w:>8} {seconds:>8.2f} {baseline[1] / seconds:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
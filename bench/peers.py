@@ -0,0 +1,71 @@
+"""Peer panels: precomputed ``PeerTable`` gather vs per-pick group scans.
+
+    python -m bench.peers [--factors 1 20] [--picks 1 10 100] [--repeat 5]
+
+The per-pick baseline is what the panel would do without the table: for
+every picked pemda and peer level, mask its group out of the wide table
+and rank / standardize each metric there.
+"""
+from __future__ import annotations
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from apbd import aggregate, peers
+from bench._synth import synthetic_long
+from bench._timing import timeit
+
+
+def panel_scan(wide: pd.DataFrame, values: pd.DataFrame, pos: np.ndarray) -> list[dict]:
+    out = []
+    for p in pos:
+        for level, keys in peers.LEVELS.items():
+            mask = np.ones(len(wide), dtype=bool)
+            for k in keys:
+                mask &= (wide[k] == wide[k].iat[p]).to_numpy()
+            group = values[mask]
+            for m in peers.PEER_METRICS:
+                col, x = group[m], values[m].iat[p]
+                out.append({
+                    "persentil": col.rank(pct=True)[p] * 100,
+                    "peringkat": int((col > x).sum()) + 1,
+                    "z": (x - col.mean()) / col.std(),
+                })
+    return out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--factors", type=int, nargs="+", default=[1, 20])
+    ap.add_argument("--picks", type=int, nargs="+", default=[1, 10, 100])
+    ap.add_argument("--repeat", type=int, default=5)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'factor':>6} {'pemda':>7} {'picks':>6} {'scan_ms':>9} {'panel_ms':>9} {'speedup':>8}")
+    for factor in args.factors:
+        wide = aggregate.build_wide(synthetic_long(factor))
+        values = peers.metric_values(wide)
+        t_build = timeit(lambda: peers.PeerTable(wide), 3)
+        table = peers.PeerTable(wide)
+        for k in args.picks:
+            pos = rng.choice(len(wide), size=min(k, len(wide)), replace=False)
+            with np.errstate(invalid="ignore"):
+                scan = pd.DataFrame(panel_scan(wide, values, pos[:1]))
+            got = table.panel(pos[:1])
+            expect = got[[f"{lv}_{st}" for lv in peers.LEVELS for st in ("persentil", "peringkat", "z")]]
+            np.testing.assert_allclose(
+                expect.to_numpy().reshape(len(peers.PEER_METRICS), len(peers.LEVELS), 3).transpose(1, 0, 2).reshape(-1, 3),
+                scan.to_numpy(dtype=np.float64), rtol=1e-9, equal_nan=True)
+            with np.errstate(invalid="ignore"):
+                t_scan = timeit(lambda: panel_scan(wide, values, pos), args.repeat)
+            t_panel = timeit(lambda: table.panel(pos), args.repeat)
+            print(f"{factor:>6} {len(wide):>7,} {len(pos):>6} {t_scan * 1e3:>9.1f} {t_panel * 1e3:>9.2f} "
+                  f"{t_scan / t_panel:>7.0f}x")
+        print(f"{factor:>6} build PeerTable for {len(wide):,} rows: {t_build * 1e3:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
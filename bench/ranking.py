@@ -0,0 +1,47 @@
+"""Top-K via presorted ranks vs ``sort_values(...).head(k)`` per widget.
+
+    python -m bench.ranking [--factors 1 20] [--k 1 20] [--repeat 50]
+"""
+from __future__ import annotations
+
+import argparse
+
+import numpy as np
+
+from apbd import aggregate, filters, ranking
+from bench._synth import synthetic_long
+from bench._timing import timeit
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--factors", type=int, nargs="+", default=[1, 20])
+    ap.add_argument("--k", type=int, nargs="+", default=[1, 20])
+    ap.add_argument("--repeat", type=int, default=50)
+    args = ap.parse_args()
+
+    print(f"{'factor':>6} {'filter':<10} {'rows':>7} {'metric':<17} {'k':>3} {'sort_us':>9} {'topk_us':>9} {'speedup':>8}")
+    for factor in args.factors:
+        wide = aggregate.build_wide(synthetic_long(factor))
+        rk = ranking.Ranker(wide)
+        cases = {
+            "semua": None,
+            "jawa": np.flatnonzero(filters.hierarchy_mask(wide, "Jawa")),
+        }
+        for label, rows in cases.items():
+            f = wide if rows is None else wide.iloc[rows]
+            for metric in ranking.RANK_METRICS:
+                for k in args.k:
+                    expect = f.sort_values(metric, ascending=False).head(k)[metric].to_numpy()
+                    got = rk.top_frame(metric, k, rows)[metric].to_numpy()
+                    np.testing.assert_array_equal(got, expect)
+                    t_sort = timeit(lambda: f.sort_values(metric, ascending=False).head(k), args.repeat)
+                    t_top = timeit(lambda: rk.top_frame(metric, k, rows), args.repeat)
+                    print(f"{factor:>6} {label:<10} {len(f):>7,} {metric:<17} {k:>3} "
+                          f"{t_sort * 1e6:>9.0f} {t_top * 1e6:>9.0f} {t_sort / t_top:>7.1f}x")
+        t_build = timeit(lambda: ranking.Ranker(wide), 3)
+        print(f"{factor:>6} build Ranker for {len(wide):,} rows: {t_build * 1e3:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Host memory of N replicas: private tables vs the shared-memory publisher.
+
+    python -m bench.replicas [--replicas 1 4 8] [--factor 20] [--dir /dev/shm/apbd-bench]
+
+Each replica is a child process that loads the first partition the way the
+app does (``watcher.Refresher`` over the Arrow cache → private tables, or
+``shared.SharedRefresher`` → memory-mapped tables published once by
+``python -m apbd.shared --once``), touches every column and then waits, so
+all replicas are alive while their ``/proc/<pid>/smaps_rollup`` is read.
+PSS splits shared pages between the processes mapping them, so the PSS sum
+is the physical memory the replicas use together.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from bench._synth import synthetic_csv
+
+CHILD = """
+import sys, time
+t = time.perf_counter()
+mode, source = sys.argv[1], sys.argv[2]
+if mode == "shared":
+    from apbd import shared
+    ref = shared.SharedRefresher(source)
+else:
+    from apbd import watcher
+    ref = watcher.Refresher(source)
+snap = ref.snapshot(ref.partitions()[0])
+for df in (snap.long, snap.wide):
+    for c in df.columns:
+        col = df[c]
+        (col.array._ndarray if hasattr(col, "cat") else col.to_numpy()).sum()
+print(time.perf_counter() - t, flush=True)
+sys.stdin.read()
+"""
+
+
+def smaps(pid: int) -> dict[str, float]:
+    """``Rss`` / ``Pss`` of a process in MB."""
+    out = {}
+    with open(f"/proc/{pid}/smaps_rollup") as fh:
+        for line in fh:
+            key = line.split(":")[0]
+            if key in ("Rss", "Pss"):
+                out[key.lower()] = int(line.split()[1]) / 1024
+    return out
+
+
+def measure(mode: str, source: str, n: int) -> dict[str, float]:
+    env = dict(os.environ, APBD_REFRESH_SECONDS="3600")
+    procs = [subprocess.Popen([sys.executable, "-c", CHILD, mode, source], stdin=subprocess.PIPE,
+                              stdout=subprocess.PIPE, text=True, env=env) for _ in range(n)]
+    try:
+        starts = [float(p.stdout.readline()) for p in procs]
+        mem = [smaps(p.pid) for p in procs]
+    finally:
+        for p in procs:
+            p.stdin.close()
+            p.wait()
+    return {
+        "start_s": sum(starts) / n,
+        "rss_mb": sum(m["rss"] for m in mem) / n,
+        "pss_total_mb": sum(m["pss"] for m in mem),
+    }
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--replicas", type=int, nargs="+", default=[1, 4, 8])
+    ap.add_argument("--factor", type=int, default=20, help="dataset size as a multiple of the bundled CSV")
+    ap.add_argument("--dir", help="publish directory (default: a temp dir under /dev/shm if present)")
+    args = ap.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="apbd-replicas-")
+    shm_root = "/dev/shm" if os.path.isdir("/dev/shm") else None
+    publish_dir = args.dir or tempfile.mkdtemp(prefix="apbd-bench-", dir=shm_root)
+    try:
+        data_dir = os.path.join(tmp, "data")
+        os.makedirs(data_dir)
+        synthetic_csv(args.factor, os.path.join(data_dir, "APBD_2023.csv"))
+        # warm the Arrow cache so private replicas load like a restarted app
+        subprocess.run([sys.executable, "-m", "apbd.cache", os.path.join(data_dir, "APBD_2023.csv")],
+                       check=True, capture_output=True)
+        subprocess.run([sys.executable, "-m", "apbd.shared", data_dir, "--dir", publish_dir, "--once"],
+                       check=True, capture_output=True)
+        published = sum(os.path.getsize(os.path.join(publish_dir, f))
+                        for f in os.listdir(publish_dir) if f.endswith(".arrow")) / 2**20
+
+        print(f"dataset ×{args.factor} • published files {published:.0f} MB in {publish_dir}")
+        print(f"{'replicas':>8} {'mode':<8} {'start_s':>8} {'RSS/replica MB':>15} {'PSS total MB':>13}")
+        for n in args.replicas:
+            for mode, source in (("private", data_dir), ("shared", publish_dir)):
+                r = measure(mode, source, n)
+                print(f"{n:>8} {mode:<8} {r['start_s']:>8.2f} {r['rss_mb']:>15.0f} {r['pss_total_mb']:>13.0f}")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+        if not args.dir:
+            shutil.rmtree(publish_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
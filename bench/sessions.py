@@ -0,0 +1,321 @@
+"""Concurrent-session load test for the Streamlit app.
+
+    python -m bench.sessions [--sessions 8] [--rounds 2] [--baseline bench/baselines/sessions.json]
+    python -m bench.sessions --sessions 8 --save-baseline bench/baselines/sessions.json
+
+Needs the ``websockets`` client (``pip install -r bench/requirements.txt``).
+Starts ``streamlit run app.py`` headless on a free port (with the metrics
+endpoint enabled) and opens ``--sessions`` websocket sessions against it,
+the way browsers do: each sends ``rerun_script`` back-messages carrying its
+widget states and waits for ``script_finished``. ``AppTest`` cannot be used
+for this because every run swaps the process-global Streamlit runtime, so
+concurrent AppTests break each other; its element-tree parser is reused to
+find widgets in the received deltas.
+
+Each session replays a scripted visit with its own random choices: first
+load, pick a pulau, pick a provinsi, type a search, clear it, switch the
+ranking metric, move the tab-2 slider, add tab-4 pie picks (tab switches
+are timed as ``tab``; an app built on ``st.tabs``, like the original one,
+renders every tab on each run and has none). Reports rerun latency
+p50/p95/p99 per interaction, server RSS growth and peak, and the hit rates
+of the app's caches over the run (scraped from ``/metrics``). ``--baseline``
+compares p95 per interaction and RSS growth with a saved run and exits
+with status 1 when any of them is more than ``--tolerance`` (default 50%)
+worse; the session and round counts default to the baseline's. Baselines
+are machine-specific: record one per CI runner with ``--save-baseline``.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import time
+import urllib.request
+
+from apbd import filters
+from bench.api_load import free_port, percentile
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+TABS = ["🏁 Ringkasan", "🏗️ Komposisi Belanja", "🧭 Rasio & Kinerja", "🥧 Breakdown Daerah"]
+SEARCHES = ["kota", "kab", "bogor", "jaya", "barat", "selatan"]
+METRICS = ["Total Belanja", "Surplus/Defisit", "Total Pendapatan"]
+SLIDER = [5, 10, 20, 25, 35]
+
+
+class Server:
+    """``streamlit run app.py`` in a subprocess (``data_dir`` → ``APBD_DATA_DIR``)."""
+
+    def __init__(self, app: str = APP, data_dir: str | None = None):
+        self.port, self.metrics_port = free_port(), free_port()
+        env = dict(os.environ, APBD_METRICS_PORT=str(self.metrics_port), APBD_REFRESH_SECONDS="3600")
+        if data_dir:
+            env["APBD_DATA_DIR"] = os.path.abspath(data_dir)
+        self.proc = subprocess.Popen(
+            [sys.executable, "-m", "streamlit", "run", app, "--server.headless", "true",
+             "--server.port", str(self.port), "--browser.gatherUsageStats", "false"],
+            env=env, cwd=os.path.dirname(app), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        self.url = f"ws://127.0.0.1:{self.port}/_stcore/stream"
+        deadline = time.time() + 60
+        while True:
+            try:
+                urllib.request.urlopen(f"http://127.0.0.1:{self.port}/_stcore/health", timeout=2).read()
+                break
+            except OSError:
+                if time.time() > deadline or self.proc.poll() is not None:
+                    raise RuntimeError("streamlit server did not start") from None
+                time.sleep(0.2)
+
+    def memory_mb(self) -> dict[str, float]:
+        """``{"rss": current, "peak": high-water mark}`` of the server (MB)."""
+        out = {}
+        with open(f"/proc/{self.proc.pid}/status") as fh:
+            for line in fh:
+                if line.startswith(("VmRSS:", "VmHWM:")):
+                    out["rss" if line.startswith("VmRSS") else "peak"] = int(line.split()[1]) / 1024
+        return out
+
+    def caches(self) -> dict[str, dict[str, int]]:
+        """Hit/miss counters per cache from the app's ``/metrics``."""
+        try:
+            text = urllib.request.urlopen(f"http://127.0.0.1:{self.metrics_port}/metrics", timeout=5).read().decode()
+        except OSError:
+            return {}
+        out: dict[str, dict[str, int]] = {}
+        for kind, name, value in re.findall(r'^apbd_cache_(hits|misses)_total\{cache="([^"]*)"\} (\d+)', text, re.M):
+            out.setdefault(name, {})[kind] = int(value)
+        return out
+
+    def stop(self) -> None:
+        self.proc.terminate()
+        self.proc.wait()
+
+
+class Session:
+    """One browser-like websocket session.
+
+    Only the widgets this session changed are sent; the server keeps every
+    other widget at its previous (or default) value, as for a browser."""
+
+    def __init__(self, ws):
+        self.ws = ws
+        self.tree = None
+        self.tab = TABS[0]
+        self._states = {}  # widget id → WidgetState set by this session
+
+    async def rerun(self) -> float:
+        """Send the widget states and wait for the run to finish; returns seconds."""
+        from streamlit.proto.BackMsg_pb2 import BackMsg
+        from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+        from streamlit.testing.v1.element_tree import parse_tree_from_messages
+
+        msg = BackMsg()
+        msg.rerun_script.query_string = ""
+        msg.rerun_script.widget_states.widgets.extend(self._states.values())
+        start = time.perf_counter()
+        await self.ws.send(msg.SerializeToString())
+        messages = []
+        while True:
+            fwd = ForwardMsg.FromString(await self.ws.recv())
+            if fwd.WhichOneof("type") == "script_finished":
+                break
+            messages.append(fwd)
+        elapsed = time.perf_counter() - start
+        if fwd.script_finished != ForwardMsg.FINISHED_SUCCESSFULLY:
+            raise RuntimeError(f"run finished with status {fwd.script_finished}")
+        self.tree = parse_tree_from_messages(messages)
+        if len(self.tree.exception):
+            raise RuntimeError(self.tree.exception[0].message)
+        return elapsed
+
+    def widget(self, kind: str, label: str):
+        return next(w for w in getattr(self.tree, kind) if w.label == label)
+
+    def set(self, widget, value) -> None:
+        """Record ``value`` for ``widget`` in the frontend's wire format (the
+        widgets driven here all show their options as plain strings)."""
+        from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+        state = WidgetState(id=widget.id)
+        if widget.type == "multiselect":
+            state.string_array_value.data[:] = [str(v) for v in value]
+        elif widget.type == "slider":
+            state.double_array_value.data[:] = [float(value)]
+        else:  # selectbox, radio, text_input
+            state.string_value = str(value)
+        self._states[widget.id] = state
+
+    def set_tab(self, tab: str) -> bool:
+        """Switch to ``tab``; False when the app renders every tab on each
+        run (``st.tabs``, as the original app did), so no rerun is needed."""
+        self.tab = tab
+        radios = [w for w in self.tree.radio if w.key == "tab"]
+        if radios:
+            self.set(radios[0], tab)
+        return bool(radios)
+
+
+def visit(rnd: random.Random, rounds: int):
+    """``(interaction, tab it happens on, action(session))`` of one scripted visit."""
+    picks: list[str] = []
+
+    def pulau(s):
+        options = [p for p in s.widget("selectbox", "Pulau").options if p != filters.ALL]
+        s.set(s.widget("selectbox", "Pulau"), rnd.choice(options))
+
+    def provinsi(s):
+        ms = s.widget("multiselect", "Provinsi")
+        s.set(ms, [rnd.choice(ms.options)])
+
+    def search(s):
+        s.set(s.widget("text_input", "Cari daerah / provinsi"), rnd.choice(SEARCHES))
+
+    def clear(s):
+        s.set(s.widget("text_input", "Cari daerah / provinsi"), "")
+        s.set(s.widget("multiselect", "Provinsi"), [])
+
+    def ranking_metric(s):
+        s.set(s.widget("selectbox", "Urutkan berdasarkan"), rnd.choice(METRICS))
+
+    def tab2_slider(s):
+        s.set(s.widget("slider", "Jumlah daerah yang ditampilkan"), rnd.choice(SLIDER))
+
+    def tab4_picks(s):
+        ms = s.widget("multiselect", "Pilih daerah untuk pie chart")
+        picks[:] = [p for p in picks if p in ms.options]
+        rest = [o for o in ms.options if o not in picks]
+        picks.extend(rnd.sample(rest, min(3, len(rest))))
+        s.set(ms, picks)
+
+    steps = [(pulau, None), (provinsi, None), (search, None), (clear, None),
+             (ranking_metric, TABS[0]), (tab2_slider, TABS[1]), (tab4_picks, TABS[3])]
+    for _ in range(rounds):
+        for action, tab in steps:
+            yield action.__name__, tab, action
+
+
+async def session(url: str, i: int, rounds: int, seed: int, latencies: dict[str, list[float]],
+                  errors: list[str]) -> None:
+    import websockets
+
+    rnd = random.Random(seed + i)
+    step = "connect"
+    try:
+        async with websockets.connect(url, subprotocols=["streamlit"], max_size=None) as ws:
+            s = Session(ws)
+            step = "load"
+            latencies.setdefault("load", []).append(await s.rerun())
+            for step, tab, action in visit(rnd, rounds):
+                if tab is not None and s.tab != tab and s.set_tab(tab):
+                    latencies.setdefault("tab", []).append(await s.rerun())
+                action(s)
+                latencies.setdefault(step, []).append(await s.rerun())
+    except Exception as exc:
+        errors.append(f"session {i} ({step}): {exc!r}")
+
+
+def run(sessions: int, rounds: int, seed: int, app: str = APP, data_dir: str | None = None) -> dict:
+    try:
+        import websockets  # noqa: F401
+    except ImportError:
+        raise SystemExit("bench.sessions needs the websockets package: pip install -r bench/requirements.txt") from None
+    server = Server(app, data_dir)
+    try:
+        mem0 = server.memory_mb()
+        latencies: dict[str, list[float]] = {}
+        errors: list[str] = []
+
+        async def all_sessions():
+            await asyncio.gather(*(session(server.url, i, rounds, seed, latencies, errors)
+                                   for i in range(sessions)))
+
+        start = time.perf_counter()
+        asyncio.run(all_sessions())
+        wall = time.perf_counter() - start
+        mem1 = server.memory_mb()
+        caches = server.caches()
+    finally:
+        server.stop()
+    return {
+        "sessions": sessions,
+        "rounds": rounds,
+        "wall_s": wall,
+        "rss_start_mb": mem0["rss"],
+        "rss_growth_mb": mem1["rss"] - mem0["rss"],
+        "rss_peak_mb": mem1["peak"],
+        "errors": errors,
+        "interactions": {
+            name: {"count": len(v), "p50_ms": percentile(v, 50) * 1e3, "p95_ms": percentile(v, 95) * 1e3,
+                   "p99_ms": percentile(v, 99) * 1e3}
+            for name, v in latencies.items()
+        },
+        "caches": {name: {**c, "hit_rate": c.get("hits", 0) / max(1, c.get("hits", 0) + c.get("misses", 0))}
+                   for name, c in caches.items()},
+    }
+
+
+def compare(result: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Regressions of ``result`` against ``baseline`` beyond ``tolerance``."""
+    out = []
+    for name, base in baseline["interactions"].items():
+        cur = result["interactions"].get(name)
+        if cur and cur["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            out.append(f"{name}: p95 {cur['p95_ms']:.0f} ms vs baseline {base['p95_ms']:.0f} ms")
+    # a few MB either way is allocator noise
+    limit = max(baseline["rss_growth_mb"] * (1 + tolerance), baseline["rss_growth_mb"] + 16)
+    if result["rss_growth_mb"] > limit:
+        out.append(f"RSS growth {result['rss_growth_mb']:.0f} MB vs baseline {baseline['rss_growth_mb']:.0f} MB")
+    return out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--sessions", type=int, help="concurrent sessions (default 8, or the baseline's)")
+    ap.add_argument("--rounds", type=int, help="times each session repeats the visit (default 2, or the baseline's)")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--data-dir", help="APBD_DATA_DIR for the server (default: data/)")
+    ap.add_argument("--baseline", help="JSON written by --save-baseline to compare against")
+    ap.add_argument("--tolerance", type=float, default=0.5)
+    ap.add_argument("--save-baseline", metavar="PATH")
+    args = ap.parse_args()
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as fh:
+            baseline = json.load(fh)
+    args.sessions = args.sessions or (baseline["sessions"] if baseline else 8)
+    args.rounds = args.rounds or (baseline["rounds"] if baseline else 2)
+
+    result = run(args.sessions, args.rounds, args.seed, data_dir=args.data_dir)
+    print(f"{args.sessions} sessions × {args.rounds} rounds in {result['wall_s']:.1f} s • server RSS "
+          f"{result['rss_start_mb']:.0f} MB + {result['rss_growth_mb']:.0f} MB (peak {result['rss_peak_mb']:.0f} MB)")
+    print(f"{'interaction':<15} {'reruns':>7} {'p50_ms':>8} {'p95_ms':>8} {'p99_ms':>8}")
+    for name, r in result["interactions"].items():
+        print(f"{name:<15} {r['count']:>7} {r['p50_ms']:>8.0f} {r['p95_ms']:>8.0f} {r['p99_ms']:>8.0f}")
+    for name, c in result["caches"].items():
+        print(f"cache {name}: {c.get('hits', 0):,} hit • {c.get('misses', 0):,} miss ({c['hit_rate']:.0%})")
+    for err in result["errors"]:
+        print(f"error: {err}", file=sys.stderr)
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(args.save_baseline) or ".", exist_ok=True)
+        with open(args.save_baseline, "w") as fh:
+            json.dump(result, fh, indent=2, ensure_ascii=False)
+        print(f"baseline written to {args.save_baseline}")
+    failed = bool(result["errors"])
+    if baseline:
+        regressions = compare(result, baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        failed |= bool(regressions)
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Rerun latency and server RSS at 1, 10 and 50 sessions: this tree vs a
+reference revision (default: the original ``st.cache_data`` app, the
+repository's root commit).
+
+    python -m bench.shared_dataset [--ref <commit>] [--sessions 1 10 50] [--factor 10]
+
+The reference revision is checked out into a temporary ``git worktree`` and
+both apps are driven by ``bench.sessions`` (one fresh server per run, one
+visit per session) on the same data: the bundled CSV replicated ``--factor``
+times, so per-rerun work that scales with the table size (hashing or
+copying it) shows up. The data is written over the worktree's
+``data/APBD_2023.csv``, the path the original app reads, and passed to
+both servers as ``APBD_DATA_DIR``.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import tempfile
+
+from bench import sessions
+from bench._synth import synthetic_csv
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def summary(result: dict) -> tuple[float, float, float]:
+    """(p50, p95, RSS growth): rerun latency over every non-load rerun (ms)
+    and server RSS growth (MB)."""
+    reruns = [r for name, r in result["interactions"].items() if name != "load"]
+    count = sum(r["count"] for r in reruns) or 1
+    p50 = sum(r["p50_ms"] * r["count"] for r in reruns) / count
+    p95 = max((r["p95_ms"] for r in reruns), default=float("nan"))
+    return p50, p95, result["rss_growth_mb"]
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--ref", help="git revision to compare against (default: the root commit)")
+    ap.add_argument("--sessions", type=int, nargs="+", default=[1, 10, 50])
+    ap.add_argument("--factor", type=int, default=10, help="dataset size as a multiple of the bundled CSV")
+    ap.add_argument("--seed", type=int, default=0)
+    args = ap.parse_args()
+
+    ref = args.ref or subprocess.run(["git", "-C", ROOT, "rev-list", "--max-parents=0", "HEAD"], check=True,
+                                     capture_output=True, text=True).stdout.split()[0][:7]
+    with tempfile.TemporaryDirectory(prefix="apbd-shared-") as tmp:
+        worktree = os.path.join(tmp, "ref")
+        subprocess.run(["git", "-C", ROOT, "worktree", "add", "--detach", worktree, ref],
+                       check=True, capture_output=True)
+        try:
+            data_dir = os.path.join(worktree, "data")
+            os.makedirs(data_dir, exist_ok=True)
+            synthetic_csv(args.factor, os.path.join(data_dir, "APBD_2023.csv"))
+            apps = {ref: os.path.join(worktree, "app.py"), "working tree": sessions.APP}
+            rows = []
+            for n in args.sessions:
+                for label, app in apps.items():
+                    result = sessions.run(n, 1, args.seed, app=app, data_dir=data_dir)
+                    for err in result["errors"]:
+                        print(f"error ({label}, {n} sessions): {err}")
+                    rows.append((n, label, result["interactions"]["load"]["p50_ms"], *summary(result)))
+                    print(f"{n:>3} sessions • {label:<14} done", flush=True)
+        finally:
+            subprocess.run(["git", "-C", ROOT, "worktree", "remove", "--force", worktree], check=False)
+
+    print(f"\ndataset ×{args.factor}; one visit per session")
+    print(f"{'sessions':>8} {'app':<14} {'load_p50':>9} {'rerun_p50':>10} {'rerun_p95':>10} {'RSS +MB':>8}")
+    for n, label, load, p50, p95, rss in rows:
+        print(f"{n:>8} {label:<14} {load:>9.0f} {p50:>10.0f} {p95:>10.0f} {rss:>8.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Cold-start regression check for the dashboard.
+
+    python -m bench.startup [--runs 3] [--budget 5.0] [--cold-cache]
+
+Each run starts a fresh interpreter, imports Streamlit's ``AppTest`` and runs
+``app.py`` once (first tab, default filters), i.e. imports + CSS + data load
++ first chart. Children run with ``APBD_PROFILE=1`` and the phase breakdown
+of the median run is printed. Exits with status 1 when the median exceeds
+the budget (``--budget`` or env ``APBD_STARTUP_BUDGET``, seconds), so it can
+gate CI. ``--cold-cache`` points ``APBD_CACHE_DIR`` at an empty directory so
+the CSV is parsed instead of read from the Arrow cache.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+CHILD = """
+import sys, time
+t = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file(sys.argv[1], default_timeout=300).run()
+if at.exception:
+    sys.exit(f"app raised: {at.exception}")
+print(time.perf_counter() - t)
+"""
+
+
+def run_once(env: dict[str, str]) -> tuple[float, str]:
+    proc = subprocess.run([sys.executable, "-c", CHILD, APP], env=env, capture_output=True, text=True,
+                          cwd=os.path.dirname(APP))
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else "child failed")
+    profile = "\n".join(line for line in proc.stderr.splitlines() if line.startswith(("[apbd]", "  ")))
+    return float(proc.stdout.strip().splitlines()[-1]), profile
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--runs", type=int, default=3)
+    ap.add_argument("--budget", type=float, default=float(os.environ.get("APBD_STARTUP_BUDGET", "5.0")))
+    ap.add_argument("--cold-cache", action="store_true", help="ignore the Arrow cache (parse CSV)")
+    args = ap.parse_args()
+
+    env = dict(os.environ, APBD_PROFILE="1", APBD_REFRESH_SECONDS="3600")
+    results = []
+    for i in range(args.runs):
+        if args.cold_cache:
+            env["APBD_CACHE_DIR"] = tempfile.mkdtemp(prefix="apbd-cache-")
+        seconds, profile = run_once(env)
+        results.append((seconds, profile))
+        print(f"run {i + 1}: {seconds:.2f} s")
+
+    median = statistics.median(s for s, _ in results)
+    print(min(results, key=lambda r: abs(r[0] - median))[1])
+    print(f"median cold start {median:.2f} s (budget {args.budget:.2f} s)")
+    if median > args.budget:
+        print("FAIL: cold start over budget", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""Peak memory of whole-file vs chunked vs streaming ingestion of one CSV.
+
+    python -m bench.stream [--factor 50] [--chunksize 200000]
+
+Writes a synthetic CSV ``factor`` times the bundled one, then builds the
+wide table in a fresh child process per mode and reports wall time and
+peak RSS (``ru_maxrss``), after checking the modes agree. ``chunked`` is
+the app's load path (``cache.build_cache``): the long table is kept, but
+normalized one chunk at a time; ``stream`` keeps only the wide totals.
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+from bench._synth import synthetic_csv
+
+CHILD = """
+import resource, sys, time
+mode, path, chunksize = sys.argv[1], sys.argv[2], int(sys.argv[3])
+t = time.perf_counter()
+if mode == "full":
+    from apbd import aggregate, loader
+    wide = aggregate.build_wide(loader.load_long(path))
+elif mode == "chunked":
+    from apbd import aggregate, loader
+    wide = aggregate.build_wide(loader.load_long_chunked(path, chunksize))
+else:
+    from apbd import stream
+    wide = stream.build_wide(path, chunksize)
+seconds = time.perf_counter() - t
+wide.to_pickle(sys.argv[4])
+print(seconds, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    ap.add_argument("--factor", type=int, default=50)
+    ap.add_argument("--chunksize", type=int, default=200_000)
+    args = ap.parse_args()
+
+    import pandas as pd
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = synthetic_csv(args.factor, os.path.join(tmp, "synthetic.csv"))
+        print(f"CSV {os.path.getsize(path) / 2**20:,.0f} MB ({args.factor}x)")
+        results = {}
+        for mode in ("full", "chunked", "stream"):
+            out = os.path.join(tmp, f"{mode}.pkl")
+            proc = subprocess.run([sys.executable, "-c", CHILD, mode, path, str(args.chunksize), out],
+                                  capture_output=True, text=True, check=True)
+            seconds, rss_kb = proc.stdout.split()
+            results[mode] = pd.read_pickle(out)
+            print(f"{mode:>7}: {float(seconds):6.2f} s, peak RSS {int(rss_kb) / 1024:8.0f} MB")
+        for mode in ("chunked", "stream"):
+            pd.testing.assert_frame_equal(results["full"], results[mode], check_exact=False, rtol=1e-9)
+        print("wide tables identical")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+import os
+
+import pandas as pd
+
+from apbd import aggregate, incremental, loader
+
+SOURCE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "APBD_2023.csv")
+
+
+def _write_sample(tmp_path, n_lines: int = 2000) -> tuple[str, list[bytes]]:
+    with open(SOURCE, "rb") as fh:
+        lines = [fh.readline() for _ in range(n_lines + 1)]
+    path = str(tmp_path / "APBD_2023.csv")
+    with open(path, "wb") as fh:
+        fh.writelines(lines)
+    return path, lines
+
+
+def _bump_mtime(path: str) -> None:
+    st_ = os.stat(path)
+    os.utime(path, ns=(st_.st_atime_ns, st_.st_mtime_ns + 1_000_000_000))
+
+
+def _edit_value(line: bytes, same_size: bool) -> bytes:
+    head, value = line.rstrip(b"\n").rsplit(b",", 1)
+    digits = value.split(b".")[0]
+    new = (b"9" * len(digits) if same_size else digits + b"7") + value[len(digits):]
+    return head + b"," + new + b"\n"
+
+
+def _assert_matches_full_rebuild(builder: incremental.PartitionBuilder, *paths: str) -> None:
+    expect = aggregate.build_wide(loader.concat_long([loader.load_long(p) for p in paths]))
+    pd.testing.assert_frame_equal(builder.current.wide, expect)
+
+
+def test_same_size_edit_mid_file_is_a_rewrite(tmp_path):
+    path, lines = _write_sample(tmp_path)
+    builder = incremental.PartitionBuilder((path,), 2023, "Anggaran")
+    mid = len(lines) // 2
+    lines[mid] = _edit_value(lines[mid], same_size=True)
+    with open(path, "r+b") as fh:
+        fh.writelines(lines)
+    _bump_mtime(path)
+
+    assert os.path.getsize(path) == builder._checkpoints[path].size
+    snap = builder.refresh()
+    assert snap.version == 2
+    assert snap.changed
+    _assert_matches_full_rebuild(builder, path)
+
+
+def test_mid_file_edit_plus_append_is_a_rewrite(tmp_path):
+    path, lines = _write_sample(tmp_path)
+    builder = incremental.PartitionBuilder((path,), 2023, "Anggaran")
+    mid = len(lines) // 2
+    lines[mid] = _edit_value(lines[mid], same_size=True)
+    with open(SOURCE, "rb") as fh:
+        extra = [fh.readline() for _ in range(len(lines) + 200)][len(lines):]
+    with open(path, "wb") as fh:
+        fh.writelines(lines + extra)
+    _bump_mtime(path)
+
+    snap = builder.refresh()
+    assert snap.version == 2
+    _assert_matches_full_rebuild(builder, path)
+
+
+def test_pure_append_takes_the_tail_path(tmp_path):
+    path, lines = _write_sample(tmp_path)
+    builder = incremental.PartitionBuilder((path,), 2023, "Anggaran")
+    with open(SOURCE, "rb") as fh:
+        extra = [fh.readline() for _ in range(len(lines) + 200)][len(lines):]
+    with open(path, "ab") as fh:
+        fh.writelines(extra)
+    _bump_mtime(path)
+
+    assert builder._detect(path) == "append"
+    builder.refresh()
+    _assert_matches_full_rebuild(builder, path)
+
+
+def test_deleted_file_drops_its_rows(tmp_path):
+    path, lines = _write_sample(tmp_path)
+    header, body = lines[0], lines[1:]
+    with open(path, "wb") as fh:
+        fh.writelines([header] + body[:len(body) // 2])
+    other = str(tmp_path / "APBD_2023_b.csv")
+    with open(other, "wb") as fh:
+        fh.writelines([header] + body[len(body) // 2:])
+    builder = incremental.PartitionBuilder((path, other), 2023, "Anggaran")
+    _assert_matches_full_rebuild(builder, path, other)
+
+    os.remove(other)
+    snap = builder.refresh()
+    assert snap.version == 2
+    assert snap.changed
+    _assert_matches_full_rebuild(builder, path)
+
+    # the file coming back is picked up again
+    with open(other, "wb") as fh:
+        fh.writelines([header] + body[len(body) // 2:])
+    builder.refresh()
+    _assert_matches_full_rebuild(builder, path, other)
@@ -0,0 +1,25 @@
+import pandas as pd
+
+from apbd.search import SearchIndex
+
+WIDE = pd.DataFrame({
+    "daerah": ["Kab. Bogor", "Kota Bogor", "Kab. Gowa", "Kota Bandung"],
+    "provinsi": ["Jawa Barat", "Jawa Barat", "Sulawesi Selatan", "Jawa Barat"],
+    "pulau": ["Jawa", "Jawa", "Sulawesi", "Jawa"],
+})
+
+
+def _names(index: SearchIndex, query: str) -> list[str]:
+    return WIDE["daerah"].iloc[index.search(query, fuzzy=False)].tolist()
+
+
+def test_short_query_matches_inside_words():
+    index = SearchIndex(WIDE)
+    assert _names(index, "go") == ["Kab. Bogor", "Kota Bogor", "Kab. Gowa"]
+    assert _names(index, "d") == ["Kota Bandung"]
+
+
+def test_trigram_query_is_substring_match():
+    index = SearchIndex(WIDE)
+    assert _names(index, "ogo") == ["Kab. Bogor", "Kota Bogor"]
+    assert _names(index, "kabupaten bogor") == ["Kab. Bogor"]
@@ -0,0 +1,38 @@
+import os
+
+from apbd import shared
+
+SOURCE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "APBD_2023.csv")
+
+
+def _write_sample(path: str, n_lines: int) -> None:
+    with open(SOURCE, "rb") as src, open(path, "wb") as fh:
+        fh.writelines(src.readline() for _ in range(n_lines + 1))
+
+
+def _manifest_files(directory: str) -> set[str]:
+    return {f for entry in shared.read_manifest(directory)["partitions"] for f in entry["files"].values()}
+
+
+def test_restarted_publisher_keeps_the_manifest_it_replaces(tmp_path):
+    data_dir, out = tmp_path / "data", str(tmp_path / "shm")
+    data_dir.mkdir()
+    csv = str(data_dir / "APBD_2023.csv")
+    _write_sample(csv, 500)
+    assert shared.Publisher(str(data_dir), out).publish()
+    first = _manifest_files(out)
+
+    # a replica may have just read the first manifest when the publisher restarts
+    _write_sample(csv, 1000)
+    st_ = os.stat(csv)
+    os.utime(csv, ns=(st_.st_atime_ns, st_.st_mtime_ns + 1_000_000_000))
+    restarted = shared.Publisher(str(data_dir), out)
+    assert restarted.publish()
+    assert first.isdisjoint(_manifest_files(out))
+    assert all(os.path.exists(os.path.join(out, f)) for f in first)
+
+    # one generation later they are no longer referenced and get dropped
+    _write_sample(csv, 1500)
+    os.utime(csv, ns=(st_.st_atime_ns, st_.st_mtime_ns + 2_000_000_000))
+    assert restarted.publish()
+    assert not any(os.path.exists(os.path.join(out, f)) for f in first)